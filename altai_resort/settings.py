@@ -31,6 +31,23 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='*', cast=Csv())
 CSRF_TRUSTED_ORIGINS = config('CSRF_TRUSTED_ORIGINS', default='', cast=Csv()) if not DEBUG else []
 
 
+# Режим сессий: 'hybrid' — анонимные посетители получают сессию без базы
+# (ANONYMOUS_SESSION_ENGINE), админка и сотрудники остаются на SESSION_ENGINE;
+# 'db' — стандартные сессии Django в базе для всех.
+SESSION_MODE = config('SESSION_MODE', default='hybrid')
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+ANONYMOUS_SESSION_ENGINE = config(
+    'ANONYMOUS_SESSION_ENGINE', default='django.contrib.sessions.backends.signed_cookies'
+)
+PRIMARY_SESSION_PATHS = ['/admin/']
+# У анонимной сессии своя cookie: SESSION_COOKIE_NAME остаётся только у
+# сессий в базе, по ней middleware сессий и пре-рендер узнают сотрудников
+ANONYMOUS_SESSION_COOKIE_NAME = 'visitor_session'
+if SESSION_MODE == 'hybrid':
+    # Flash-сообщения целиком в cookie, без обращения к сессии
+    MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -46,33 +63,58 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.AsyncStreamingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'main.middleware.WhiteNoiseMiddleware',
+    'main.middleware.CompressionMiddleware',
+    'main.middleware.ReplicaRoutingMiddleware',
+    'main.middleware.HybridSessionMiddleware' if SESSION_MODE == 'hybrid'
+    else 'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'main.middleware.PrerenderMiddleware',
 ]
 
 ROOT_URLCONF = 'altai_resort.urls'
 
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
+# Движок публичных страниц: 'django' или 'jinja2'. Шаблоны для Jinja2 лежат
+# в jinja2/ и повторяют templates/; админка и шаблоны сторонних приложений
+# (crispy) всегда рендерятся Django-шаблонами.
+TEMPLATE_ENGINE = config('TEMPLATE_ENGINE', default='django')
+# Каталог bytecode cache Jinja2 (пусто — временный каталог системы)
+JINJA2_BYTECODE_CACHE_DIR = config('JINJA2_BYTECODE_CACHE_DIR', default='')
+
+DJANGO_TEMPLATES = {
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'DIRS': [BASE_DIR / 'templates'],
+    'APP_DIRS': True,
+    'OPTIONS': {
+        'context_processors': [
+            'django.template.context_processors.debug',
+            'django.template.context_processors.request',
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+        ],
     },
-]
+}
+
+JINJA2_TEMPLATES = {
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'DIRS': [BASE_DIR / 'jinja2'],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'environment': 'main.jinja2.environment',
+        'context_processors': [
+            'django.contrib.messages.context_processors.messages',
+        ],
+    },
+}
+
+# Первым ищет шаблон Jinja2, чего в jinja2/ нет — рендерит Django
+TEMPLATES = [JINJA2_TEMPLATES, DJANGO_TEMPLATES] if TEMPLATE_ENGINE == 'jinja2' else [DJANGO_TEMPLATES]
 
 WSGI_APPLICATION = 'altai_resort.wsgi.application'
 
@@ -80,13 +122,51 @@ WSGI_APPLICATION = 'altai_resort.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite работает через altai_resort.sqlite: PRAGMA-профиль применяется к каждому
+# новому соединению, а транзакции записи открываются как BEGIN IMMEDIATE.
+SQLITE_OPTIONS = {
+    'transaction_mode': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+    'pragmas': {
+        'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+        'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+        'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),
+        'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+        'cache_size': config('SQLITE_CACHE_SIZE', default=-20000, cast=int),
+        'temp_store': config('SQLITE_TEMP_STORE', default='MEMORY'),
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'altai_resort.sqlite',
         'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+        'OPTIONS': SQLITE_OPTIONS,
     }
 }
 
+# Реплики только для чтения (main/db_router.py). SQLITE_REPLICA_PATHS — копии
+# основной базы, открываемые в режиме read-only; локально их обновляет команда
+# sync_replicas. Реплики другой СУБД описываются в DATABASES и перечисляются
+# в DATABASE_REPLICAS.
+SQLITE_REPLICA_PATHS = config('SQLITE_REPLICA_PATHS', default='', cast=Csv())
+DATABASE_REPLICAS = []
+for index, replica_path in enumerate(SQLITE_REPLICA_PATHS, start=1):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'altai_resort.sqlite',
+        'NAME': Path(replica_path).resolve().as_uri() + '?mode=ro',
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['main.db_router.ReplicaRouter']
+REPLICA_HEALTH_CHECK_INTERVAL = config('REPLICA_HEALTH_CHECK_INTERVAL', default=10, cast=int)
+REPLICA_STICKY_COOKIE = 'read_primary'
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+REPLICA_PRIMARY_PATHS = ['/admin/']
+# django_cache — таблица DatabaseCache, если кэш держат в базе: читается без отставания реплик
+REPLICA_PRIMARY_APPS = ['admin', 'auth', 'contenttypes', 'sessions', 'django_cache']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -123,18 +203,114 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# Результат `manage.py build_assets` (бандлы и critical CSS), см. main/assets.py
+ASSETS_BUILD_DIR = BASE_DIR / 'assets_build'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
+    *([ASSETS_BUILD_DIR] if ASSETS_BUILD_DIR.exists() else []),
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # WhiteNoise for efficient static files in production
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Подключать собранные бандлы вместо исходных CSS/JS (если они собраны)
+ASSETS_USE_BUNDLES = config('ASSETS_USE_BUNDLES', default=not DEBUG, cast=bool)
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Загрузки сохраняются под именем из хэша содержимого и отдаются main.media.serve_media
+DEFAULT_FILE_STORAGE = 'main.media.HashedMediaStorage'
+# Отдавать MEDIA_URL из Django (False — медиа отдаёт nginx/CDN напрямую)
+MEDIA_SERVE = config('MEDIA_SERVE', default=True, cast=bool)
+# Кэширование файлов со старыми (не хэшированными) именами, сек
+MEDIA_MAX_AGE = config('MEDIA_MAX_AGE', default=3600, cast=int)
+# Префикс internal-location nginx, например /protected-media/: файл отдаёт nginx
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='altai-resort'),
+    }
+}
+
+# Rate limiting для JSON API (см. main/ratelimit.py).
+# Формат правил: "<запросов>/<s|m|h|d>". RATELIMIT_CACHE должен указывать
+# на общий для воркеров кэш с атомарным incr вне основной базы (Redis) —
+# иначе лимиты умножаются на число воркеров или каждый запрос к API пишет
+# в SQLite; `manage.py check --deploy` это проверяет.
+RATELIMIT_ENABLED = config('RATELIMIT_ENABLED', default=True, cast=bool)
+RATELIMIT_CACHE = config('RATELIMIT_CACHE', default='default')
+RATELIMIT_RATES = {
+    'check_availability': config('RATELIMIT_CHECK_AVAILABILITY', default='60/m'),
+    'calculate_price': config('RATELIMIT_CALCULATE_PRICE', default='60/m'),
+    'catalogue': config('RATELIMIT_CATALOGUE', default='120/m'),
+    'alternative_dates': config('RATELIMIT_ALTERNATIVE_DATES', default='30/m'),
+}
+RATELIMIT_API_KEY_HEADER = 'X-Api-Key'
+RATELIMIT_API_KEYS = config('RATELIMIT_API_KEYS', default='', cast=Csv())
+RATELIMIT_API_KEY_RATE = config('RATELIMIT_API_KEY_RATE', default='600/m')
+RATELIMIT_TRUST_X_FORWARDED_FOR = config('RATELIMIT_TRUST_X_FORWARDED_FOR', default=False, cast=bool)
+# Сколько доверенных прокси перед приложением дописывают X-Forwarded-For
+RATELIMIT_TRUSTED_PROXIES = config('RATELIMIT_TRUSTED_PROXIES', default=1, cast=int)
+
+# Режим gunicorn (см. gunicorn.conf.py): wsgi или asgi
+SERVER_MODE = config('SERVER_MODE', default='wsgi').lower()
+
+# Сброс нагрузки под ASGI: сколько запросов к API один воркер обрабатывает
+# одновременно (0 — без ограничения) и значение Retry-After для ответов 503.
+# Лимит на процесс, а не на все воркеры вместе. Под WSGI не применяется:
+# sync-воркер и так обрабатывает один запрос за раз.
+API_MAX_CONCURRENT = config('API_MAX_CONCURRENT', default=4, cast=int)
+API_SHED_RETRY_AFTER = config('API_SHED_RETRY_AFTER', default=2, cast=int)
+
+# Время жизни кэша ответов JSON API каталога (сек); сброс — по сигналам моделей
+CATALOGUE_CACHE_TIMEOUT = config('CATALOGUE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Сжатие динамических ответов (main.middleware.CompressionMiddleware).
+# COMPRESSION_BREACH_PADDING — максимум случайных байт для страниц с CSRF-токеном,
+# 0 — такие страницы не сжимать вовсе.
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=512, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+COMPRESSION_BREACH_PADDING = config('COMPRESSION_BREACH_PADDING', default=100, cast=int)
+COMPRESSION_CONTENT_TYPES = [
+    'text/html', 'text/plain', 'text/css', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+]
+
+# Пре-рендеринг маркетинговых страниц (`manage.py prerender`, main/prerender.py).
+# Страница старше PRERENDER_MAX_AGE секунд снова отдаётся представлением.
+PRERENDER_ENABLED = config('PRERENDER_ENABLED', default=not DEBUG, cast=bool)
+PRERENDER_ROOT = config('PRERENDER_ROOT', default=str(BASE_DIR / 'prerendered'))
+PRERENDER_MAX_AGE = config('PRERENDER_MAX_AGE', default=24 * 3600, cast=int)
+
+# Поиск альтернативных дат: на сколько дней от желаемых дат искать и сколько домиков предлагать
+ALTERNATIVE_DATES_HORIZON_DAYS = config('ALTERNATIVE_DATES_HORIZON_DAYS', default=90, cast=int)
+ALTERNATIVE_DATES_MAX_RESULTS = config('ALTERNATIVE_DATES_MAX_RESULTS', default=5, cast=int)
+
+# Жизненный цикл бронирований (`manage.py booking_lifecycle`, main/lifecycle.py)
+BOOKING_BATCH_SIZE = config('BOOKING_BATCH_SIZE', default=500, cast=int)
+BOOKING_HOLD_HOURS = config('BOOKING_HOLD_HOURS', default=0, cast=int)
+BOOKING_ARCHIVE_MONTHS = config('BOOKING_ARCHIVE_MONTHS', default=12, cast=int)
+
+# Адрес сайта для абсолютных ссылок в sitemap.xml и JSON-LD (main/seo.py)
+SITE_URL = config('SITE_URL', default='https://altai-tishina.ru')
+SEO_CACHE_TIMEOUT = config('SEO_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Массовый импорт каталога (`manage.py import_catalogue`, импорт в админке, main/bulk_import.py)
+BULK_IMPORT_BATCH_SIZE = config('BULK_IMPORT_BATCH_SIZE', default=200, cast=int)
+BULK_IMPORT_WORKERS = config('BULK_IMPORT_WORKERS', default=4, cast=int)
+BULK_IMPORT_MAX_IMAGE_SIZE = config('BULK_IMPORT_MAX_IMAGE_SIZE', default=10 * 1024 * 1024, cast=int)
+
+# Цель по времени до первого байта после холодного старта (команда startup_profile)
+STARTUP_TTFB_TARGET_MS = config('STARTUP_TTFB_TARGET_MS', default=1000, cast=int)
+
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
@@ -0,0 +1,61 @@
+"""
+SQLite-бэкенд с настраиваемым профилем PRAGMA.
+
+Каждое новое соединение получает PRAGMA из ``OPTIONS['pragmas']``
+(WAL, busy_timeout, mmap и т.д.), а транзакции записи открываются через
+``BEGIN IMMEDIATE``, чтобы блокировка на запись бралась сразу, а не при
+первом UPDATE/INSERT — это и убирает "database is locked" при
+пересечении запросов админки и бронирования.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base as sqlite3_base
+
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE_RE = re.compile(r'^-?[\w]+$')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(sqlite3_base.DatabaseWrapper):
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = self.settings_dict.get('OPTIONS') or {}
+        self.pragmas = options.get('pragmas') or {}
+        self.transaction_mode = (options.get('transaction_mode') or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                "OPTIONS['transaction_mode'] должен быть одним из: %s" % ', '.join(TRANSACTION_MODES)
+            )
+        for name, value in self.pragmas.items():
+            if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(str(value)):
+                raise ImproperlyConfigured(f"Недопустимая PRAGMA: {name}={value!r}")
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # Остальные OPTIONS уходят напрямую в sqlite3.connect()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f"BEGIN {self.transaction_mode}")
+
+    def get_pragma_status(self):
+        """Текущие значения PRAGMA активного соединения (для диагностики)."""
+        names = ['journal_mode', 'synchronous', 'busy_timeout', 'mmap_size',
+                 'cache_size', 'temp_store', 'foreign_keys']
+        names += [name for name in self.pragmas if name not in names]
+        status = {}
+        with self.cursor() as cursor:
+            for name in names:
+                row = cursor.execute(f"PRAGMA {name}").fetchone()
+                status[name] = row[0] if row else None
+        return status
@@ -19,12 +19,19 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from main.media import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('main.urls')),
 ]
 
-# Добавляем маршруты для статических и медиа файлов в режиме разработки
+# Добавляем маршруты для статических файлов в режиме разработки
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+# Медиа отдаются и в продакшне: кэширование, Range, sendfile под WSGI (main/media.py)
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        path(f'{settings.MEDIA_URL.strip("/")}/<path:path>', serve_media, name='media'),
+    ]
@@ -0,0 +1,41 @@
+"""
+Конфигурация gunicorn (подхватывается автоматически из корня проекта).
+
+SERVER_MODE=wsgi — классические sync-воркеры (по умолчанию);
+SERVER_MODE=asgi — uvicorn-воркеры, async-представления API работают
+без блокировки воркера медленными клиентами.
+
+GUNICORN_PRELOAD=true — приложение загружается и прогревается в мастере
+до fork (main/startup.py): воркеры стартуют готовыми, и первый посетитель
+после пробуждения не ждёт импорта Django и рендера главной.
+MIGRATE_ON_START=true (вместе с GUNICORN_PRELOAD) проверяет миграции там же.
+"""
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi').lower()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+
+if server_mode == 'asgi':
+    wsgi_app = 'altai_resort.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'altai_resort.wsgi:application'
+    worker_class = 'sync'
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() in ('1', 'true', 'yes')
+# Вместе с preload: migrate_if_needed в мастере, без отдельного запуска manage.py
+migrate_on_start = os.environ.get('MIGRATE_ON_START', 'false').lower() in ('1', 'true', 'yes')
+
+
+def when_ready(server):
+    # Вызывается в мастере до запуска воркеров
+    if preload_app:
+        from django.core.management import call_command
+
+        from main.startup import warm_up
+
+        if migrate_on_start:
+            call_command('migrate_if_needed')
+        server.log.info('Прогрев приложения: %.0f мс', warm_up())
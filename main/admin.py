@@ -1,10 +1,59 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
-from .models import House, Booking, Review, GalleryImage, Contact
+from .bulk_import import IMPORTERS, import_catalogue
+from .forms import BulkImportForm
+from .models import House, Booking, BookingArchive, Review, GalleryImage, Contact
+
+
+class BulkImportMixin:
+    """Кнопка «Импорт из файла» в списке объектов (main/bulk_import.py)"""
+    import_kind = None
+    change_list_template = 'admin/main/change_list_import.html'
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='%s_%s_import' % info),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = BulkImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if form.is_valid():
+            manifest = form.cleaned_data['manifest']
+            try:
+                result = import_catalogue(self.import_kind, manifest, manifest.name, form.cleaned_data['images'])
+            except ValueError as exc:
+                form.add_error(None, str(exc))
+            else:
+                if result['created']:
+                    self.message_user(request, f"Импортировано записей: {result['created']}", messages.SUCCESS)
+                if not result['errors']:
+                    return redirect(f'admin:{self.model._meta.app_label}_{self.model._meta.model_name}_changelist')
+                self.message_user(request, f"Записей с ошибками: {len(result['errors'])}", messages.WARNING)
+
+        _, fields, image_field = IMPORTERS[self.import_kind]
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Импорт: {self.model._meta.verbose_name_plural}',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+            'fields': fields + [image_field],
+            'image_field': image_field,
+        }
+        return TemplateResponse(request, 'admin/main/import.html', context)
 
 
 @admin.register(House)
-class HouseAdmin(admin.ModelAdmin):
+class HouseAdmin(BulkImportMixin, admin.ModelAdmin):
+    import_kind = 'houses'
     list_display = ['name', 'capacity', 'price_per_night', 'is_available', 'created_at']
     list_filter = ['is_available', 'capacity', 'created_at']
     search_fields = ['name', 'description']
@@ -33,6 +82,7 @@ class BookingAdmin(admin.ModelAdmin):
     list_editable = ['status']
     readonly_fields = ['created_at', 'updated_at', 'total_price']
     date_hierarchy = 'check_in_date'
+    list_select_related = ['house']
     
     fieldsets = (
         ('Информация о госте', {
@@ -51,8 +101,25 @@ class BookingAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(admin.ModelAdmin):
+    list_display = ['guest_name', 'house', 'check_in_date', 'check_out_date', 'status', 'total_price', 'archived_at']
+    list_filter = ['status', 'house']
+    search_fields = ['guest_name', 'guest_phone', 'guest_email']
+    date_hierarchy = 'check_in_date'
+    list_select_related = ['house']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Архив только для просмотра
+        return False
+
+
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(BulkImportMixin, admin.ModelAdmin):
+    import_kind = 'reviews'
     list_display = ['guest_name', 'rating', 'is_approved', 'created_at']
     list_filter = ['rating', 'is_approved', 'created_at']
     search_fields = ['guest_name', 'text']
@@ -74,7 +141,8 @@ class ReviewAdmin(admin.ModelAdmin):
 
 
 @admin.register(GalleryImage)
-class GalleryImageAdmin(admin.ModelAdmin):
+class GalleryImageAdmin(BulkImportMixin, admin.ModelAdmin):
+    import_kind = 'gallery'
     list_display = ['title', 'is_featured', 'order', 'image_preview', 'created_at']
     list_filter = ['is_featured', 'created_at']
     search_fields = ['title', 'description']
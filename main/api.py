@@ -0,0 +1,283 @@
+"""
+Компактный read-only JSON API каталога: домики, отзывы, галерея.
+
+Параметр ``fields`` выбирает поля (sparse fieldsets) и превращается в
+проекцию ``.values()``, поэтому длинные TextField не читаются из базы,
+если их не запросили. Пагинация курсорная (keyset по полям сортировки),
+готовые сериализованные ответы кэшируются и инвалидируются сигналами
+моделей (см. main/signals.py). Номера версий каталога хранятся в кэше
+``default``, поэтому он должен быть общим для воркеров — иначе сигнал в
+одном воркере не сбросит кэш остальных (проверка main.E002 в check --deploy).
+"""
+import base64
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+
+from .db_router import on_primary
+from .decorators import require_http_methods
+from .models import GalleryImage, House, Review
+from .ratelimit import rate_limit
+from .views import HOUSE_SORTS, filter_houses
+
+try:
+    import msgpack
+except ImportError:  # msgpack — необязательная зависимость
+    msgpack = None
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def image_url(name):
+    return default_storage.url(name) if name else None
+
+
+def decimal_value(value):
+    return float(value) if value is not None else None
+
+
+def datetime_value(value):
+    return value.isoformat() if value is not None else None
+
+
+@dataclass
+class Resource:
+    """Описание ресурса каталога: поля, их преобразование и сортировки"""
+    name: str
+    queryset: object
+    converters: dict
+    default_fields: tuple
+    orderings: dict
+    default_ordering: str
+    filter_fn: object = None
+    cursor_converters: dict = field(default_factory=dict)
+
+    def get_queryset(self, params):
+        queryset = self.queryset()
+        if self.filter_fn:
+            queryset = self.filter_fn(queryset, params)
+        return queryset
+
+
+RESOURCES = {
+    'houses': Resource(
+        name='houses',
+        queryset=lambda: House.objects.filter(is_available=True),
+        converters={
+            'id': None,
+            'name': None,
+            'description': None,
+            'capacity': None,
+            'price_per_night': decimal_value,
+            'image': image_url,
+            'updated_at': datetime_value,
+        },
+        default_fields=('id', 'name', 'capacity', 'price_per_night', 'image'),
+        orderings={key: (value, '-id' if value.startswith('-') else 'id')
+                   for key, value in HOUSE_SORTS.items()},
+        default_ordering='name',
+        filter_fn=filter_houses,
+        cursor_converters={'price_per_night': str},
+    ),
+    'reviews': Resource(
+        name='reviews',
+        queryset=lambda: Review.objects.filter(is_approved=True),
+        converters={
+            'id': None,
+            'guest_name': None,
+            'rating': None,
+            'text': None,
+            'avatar': image_url,
+            'created_at': datetime_value,
+        },
+        default_fields=('id', 'guest_name', 'rating', 'text', 'created_at'),
+        orderings={'newest': ('-created_at', '-id')},
+        default_ordering='newest',
+        cursor_converters={'created_at': datetime_value},
+    ),
+    'gallery': Resource(
+        name='gallery',
+        queryset=lambda: GalleryImage.objects.all(),
+        converters={
+            'id': None,
+            'title': None,
+            'description': None,
+            'image': image_url,
+            'alt_text': None,
+            'is_featured': None,
+            'order': None,
+            'created_at': datetime_value,
+        },
+        default_fields=('id', 'title', 'image', 'alt_text'),
+        orderings={'order': ('order', '-created_at', '-id')},
+        default_ordering='order',
+        cursor_converters={'created_at': datetime_value},
+    ),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise BadRequest('Неверный курсор')
+    # Только скаляры: объект или список в значении поля уронил бы фильтр
+    if not isinstance(values, list) or not all(isinstance(value, (str, int, float)) for value in values):
+        raise BadRequest('Неверный курсор')
+    return values
+
+
+def keyset_filter(ordering, values):
+    """Условие "строго после values" для сортировки ordering"""
+    condition = Q()
+    for index, order_field in enumerate(ordering):
+        name = order_field.lstrip('-')
+        lookup = 'lt' if order_field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        for previous, value in zip(ordering[:index], values[:index]):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def parse_fields(resource, params):
+    requested = params.get('fields')
+    if not requested:
+        return resource.default_fields
+    # Пустые элементы ("fields=," или "id,,name") пропускаем
+    fields = tuple(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+    if not fields:
+        return resource.default_fields
+    unknown = [name for name in fields if name not in resource.converters]
+    if unknown:
+        raise BadRequest('Неизвестные поля: %s' % ', '.join(unknown))
+    return fields
+
+
+def parse_limit(params):
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest('Неверный limit')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def build_page(resource, params):
+    fields = parse_fields(resource, params)
+    limit = parse_limit(params)
+    ordering = resource.orderings.get(params.get('sort'), resource.orderings[resource.default_ordering])
+    order_names = [name.lstrip('-') for name in ordering]
+
+    queryset = resource.get_queryset(params).order_by(*ordering)
+    cursor = params.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise BadRequest('Неверный курсор')
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    columns = list(dict.fromkeys(fields + tuple(order_names)))
+    rows = list(queryset.values_list(*columns)[:limit + 1])
+
+    # Быстрый путь сериализации: кортежи из values_list и заранее
+    # выбранные преобразователи, без создания моделей и форм
+    converters = [(columns.index(name), name, resource.converters[name]) for name in fields]
+    results = []
+    for row in rows[:limit]:
+        item = {}
+        for index, name, convert in converters:
+            value = row[index]
+            item[name] = convert(value) if convert else value
+        results.append(item)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        cursor_values = []
+        for name in order_names:
+            value = last[columns.index(name)]
+            convert = resource.cursor_converters.get(name)
+            cursor_values.append(convert(value) if convert else value)
+        next_cursor = encode_cursor(cursor_values)
+
+    return {'results': results, 'next': next_cursor}
+
+
+def response_format(request):
+    fmt = request.GET.get('format')
+    if fmt is None and 'application/msgpack' in request.headers.get('Accept', ''):
+        fmt = 'msgpack'
+    return fmt or 'json'
+
+
+def serialize(payload, fmt):
+    if fmt == 'msgpack':
+        return msgpack.packb(payload, use_bin_type=True), 'application/msgpack'
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode()
+    return body, 'application/json'
+
+
+def catalogue_version(resource_name):
+    return cache.get_or_set(f'catalogue:version:{resource_name}', 1, None)
+
+
+def bump_catalogue_version(resource_name):
+    key = f'catalogue:version:{resource_name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def cache_key(resource_name, fmt, params):
+    query = '&'.join(f'{key}={value}' for key, value in sorted(params.items()) if key != 'format')
+    digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    return f'catalogue:{resource_name}:{catalogue_version(resource_name)}:{fmt}:{digest}'
+
+
+@require_http_methods(["GET"])
+@rate_limit('catalogue')
+def catalogue(request, resource_name):
+    """Read-only JSON (или msgpack) список ресурса каталога"""
+    resource = RESOURCES[resource_name]
+    fmt = response_format(request)
+    if fmt not in ('json', 'msgpack'):
+        return JsonResponse({'error': 'Неизвестный формат'}, status=400)
+    if fmt == 'msgpack' and msgpack is None:
+        return JsonResponse({'error': 'Формат msgpack недоступен'}, status=406)
+
+    key = cache_key(resource_name, fmt, request.GET.dict())
+    cached = cache.get(key)
+    if cached is None:
+        try:
+            payload = on_primary(build_page)(resource, request.GET)
+        except BadRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except (ValueError, ValidationError):
+            return JsonResponse({'error': 'Неверные параметры запроса'}, status=400)
+        cached = serialize(payload, fmt)
+        cache.set(key, cached, settings.CATALOGUE_CACHE_TIMEOUT)
+
+    body, content_type = cached
+    response = HttpResponse(body, content_type=content_type)
+    response['Cache-Control'] = f'public, max-age={settings.CATALOGUE_CACHE_TIMEOUT}'
+    response['Vary'] = 'Accept'
+    return response
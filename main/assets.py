@@ -0,0 +1,182 @@
+"""
+Сборка статических ресурсов: бандлы, минификация и critical CSS.
+
+Команда ``build_assets`` собирает бандлы из ``BUNDLES`` в
+``settings.ASSETS_BUILD_DIR``, откуда их забирает collectstatic:
+CompressedManifestStaticFilesStorage добавляет хэш в имя, а WhiteNoise
+заранее сжимает файлы gzip и Brotli (при установленном пакете Brotli).
+Минификация — rcssmin и rjsmin: полноценные токенизаторы CSS и JS
+(строки, регулярные выражения, комментарии в конце строки).
+"""
+import re
+from pathlib import Path
+
+import rcssmin
+import rjsmin
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+# Имя бандла -> исходные файлы (пути относительно static/). Стили отдельных
+# страниц (pages/*) подключаются в шаблонах тегом {% stylesheets 'pages/...' %}
+BUNDLES = {
+    'site.css': ['css/style.css', 'css/animations.css'],
+    'site.js': ['js/main.js'],
+    'pages/about.css': ['css/pages/about.css'],
+    'pages/booking_success.css': ['css/pages/booking_success.css'],
+    'pages/contact.css': ['css/pages/contact.css'],
+    'pages/houses_list.css': ['css/pages/houses_list.css'],
+}
+
+# Страницы с инлайновым critical CSS: какие шаблоны и до какого маркера
+# считаются первым экраном, и из какого бандла выбираются правила
+CRITICAL_PAGES = {
+    'home': {
+        'bundle': 'site.css',
+        'above_the_fold': [
+            ('base.html', '{% block content %}'),
+            ('main/home.html', '<!-- About Section -->'),
+        ],
+    },
+}
+
+BUILD_PREFIX = 'build'
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+INLINE_STYLE_RE = re.compile(
+    r'{% block extra_css %}\s*<style>\n?(?P<css>.*?)</style>\s*{% endblock %}', re.S
+)
+
+
+def bundle_path(name):
+    """Путь бандла внутри static/: pages/about.css -> build/pages/about.min.css"""
+    stem, ext = name.rsplit('.', 1)
+    return f'{BUILD_PREFIX}/{stem}.min.{ext}'
+
+
+def critical_path(page):
+    return f'{BUILD_PREFIX}/critical-{page}.css'
+
+
+def read_static(path):
+    found = finders.find(path)
+    if not found:
+        raise FileNotFoundError(path)
+    return Path(found).read_text(encoding='utf-8')
+
+
+def minify_css(css):
+    # Пробел перед ':' в селекторе (".a :hover") rcssmin сохраняет, в объявлениях убирает
+    return rcssmin.cssmin(css)
+
+
+def minify_js(js):
+    return rjsmin.jsmin(js) + '\n'
+
+
+def build_bundle(name):
+    sources = [read_static(path) for path in BUNDLES[name]]
+    minify = minify_css if name.endswith('.css') else minify_js
+    return minify('\n'.join(sources))
+
+
+def parse_css_rules(css):
+    """Разбивает CSS на правила верхнего уровня: [(prelude, body), ...]"""
+    css = CSS_COMMENT_RE.sub('', css)
+    rules, depth, start, prelude = [], 0, 0, ''
+    for index, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude = css[start:index].strip()
+                start = index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:index]))
+                start = index + 1
+    return rules
+
+
+def used_tokens(template_chunks):
+    """Классы, id и теги, встречающиеся в разметке первого экрана"""
+    tokens = {'html', 'body', '*', ':root'}
+    for html in template_chunks:
+        for classes in re.findall(r'class="([^"{]*)', html):
+            tokens.update(f'.{name}' for name in classes.split())
+        tokens.update(f'#{name}' for name in re.findall(r'id="([\w-]+)"', html))
+        tokens.update(re.findall(r'<([a-z][a-z0-9]*)', html))
+    return tokens
+
+
+def selector_matches(selector, tokens):
+    simple = re.sub(r'::?[\w-]+(\([^)]*\))?', ' ', selector)
+    parts = re.findall(r'[.#]?[\w-]+|\*', simple)
+    return bool(parts) and all(part in tokens for part in parts)
+
+
+def select_rules(rules, tokens):
+    selected, animations = [], set()
+    for prelude, body in rules:
+        if prelude.startswith('@media'):
+            inner = select_rules(parse_css_rules(body), tokens)
+            if inner:
+                selected.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            continue
+        elif prelude == ':root' or any(selector_matches(s, tokens) for s in prelude.split(',')):
+            selected.append(f'{prelude}{{{body}}}')
+            animations.update(re.findall(r'animation(?:-name)?\s*:\s*([\w-]+)', body))
+    for prelude, body in rules:
+        if prelude.startswith('@keyframes') and prelude.split()[-1] in animations:
+            selected.append(f'{prelude}{{{body}}}')
+    return ''.join(selected)
+
+
+def build_critical_css(page):
+    config = CRITICAL_PAGES[page]
+    chunks = []
+    for template_name, marker in config['above_the_fold']:
+        source = (Path(settings.BASE_DIR) / 'templates' / template_name).read_text(encoding='utf-8')
+        chunks.append(source.split(marker, 1)[0])
+    css = '\n'.join(read_static(path) for path in BUNDLES[config['bundle']])
+    return minify_css(select_rules(parse_css_rules(css), used_tokens(chunks)))
+
+
+def build_all(output_dir):
+    """Пишет бандлы и critical CSS, возвращает [(путь, размер), ...]"""
+    output_dir = Path(output_dir)
+    written = []
+    outputs = {bundle_path(name): build_bundle(name) for name in BUNDLES}
+    outputs.update({critical_path(page): build_critical_css(page) for page in CRITICAL_PAGES})
+    for path, content in outputs.items():
+        target = output_dir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content, encoding='utf-8')
+        written.append((path, len(content.encode())))
+    return written
+
+
+def extract_inline_styles(template_path, static_dir):
+    """
+    Переносит блок ``{% block extra_css %}<style>...</style>`` шаблона
+    в static/css/pages/<шаблон>.css и подключает его тегом {% stylesheets %}
+    как бандл pages/<шаблон>.css (его нужно добавить в BUNDLES).
+    Возвращает путь созданного файла или None.
+    """
+    template_path = Path(template_path)
+    source = template_path.read_text(encoding='utf-8')
+    match = INLINE_STYLE_RE.search(source)
+    if not match:
+        return None
+    static_name = f'css/pages/{template_path.stem}.css'
+    target = Path(static_dir) / static_name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(match.group('css'), encoding='utf-8')
+    link = (
+        '{% block extra_css %}\n'
+        f'{{% stylesheets \'pages/{template_path.stem}.css\' %}}\n'
+        '{% endblock %}'
+    )
+    source = source.replace("{% extends 'base.html' %}", "{% extends 'base.html' %}\n{% load assets %}", 1)
+    template_path.write_text(source[:match.start()] + link + source[match.end():], encoding='utf-8')
+    return static_name
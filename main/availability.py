@@ -0,0 +1,90 @@
+"""
+Поиск ближайших свободных окон для домиков.
+
+Занятые интервалы всех домиков читаются одним запросом, отсортированными
+по (домик, дата заезда); свободные промежутки между ними обходятся за
+один проход без перебора дат по одной.
+"""
+import datetime
+from itertools import groupby
+
+from .models import Booking
+
+
+def free_gaps(intervals, earliest, horizon_end):
+    """
+    Свободные промежутки [начало, конец) между занятыми интервалами,
+    отсортированными по дате заезда (интервалы могут пересекаться).
+    """
+    cursor = earliest
+    for check_in, check_out in intervals:
+        if check_in > cursor:
+            yield cursor, min(check_in, horizon_end)
+        cursor = max(cursor, check_out)
+        if cursor >= horizon_end:
+            return
+    if cursor < horizon_end:
+        yield cursor, horizon_end
+
+
+def nearest_windows(intervals, desired_start, nights, earliest, horizon_end):
+    """Ближайшие окна на nights ночей до и после desired_start: (before, after)"""
+    stay = datetime.timedelta(days=nights)
+    before = after = None
+    for gap_start, gap_end in free_gaps(intervals, earliest, horizon_end):
+        if gap_end - gap_start < stay:
+            continue
+        latest_start = gap_end - stay
+        if gap_start <= desired_start:
+            before = min(latest_start, desired_start)
+        if after is None and latest_start >= desired_start:
+            after = max(gap_start, desired_start)
+            break
+    return before, after
+
+
+def window(start, nights):
+    if start is None:
+        return None
+    return {
+        'check_in': start.isoformat(),
+        'check_out': (start + datetime.timedelta(days=nights)).isoformat(),
+    }
+
+
+async def afind_alternatives(houses, desired_start, nights, earliest, horizon_end):
+    """
+    Ближайшие свободные окна для каждого домика из houses (список House),
+    отсортированные по удалённости от желаемой даты заезда.
+    """
+    booked = (
+        Booking.objects
+        .filter(
+            house__in=houses,
+            status__in=Booking.ACTIVE_STATUSES,
+            check_out_date__gt=earliest,
+            check_in_date__lt=horizon_end,
+        )
+        .order_by('house_id', 'check_in_date')
+        .values_list('house_id', 'check_in_date', 'check_out_date')
+    )
+    intervals = {house.id: [] for house in houses}
+    rows = [row async for row in booked]
+    for house_id, group in groupby(rows, key=lambda row: row[0]):
+        intervals[house_id] = [(check_in, check_out) for _, check_in, check_out in group]
+
+    suggestions = []
+    for house in houses:
+        before, after = nearest_windows(intervals[house.id], desired_start, nights, earliest, horizon_end)
+        if before is None and after is None:
+            continue
+        distance = min(abs((start - desired_start).days) for start in (before, after) if start is not None)
+        suggestions.append({
+            'house_id': house.id,
+            'house_name': house.name,
+            'before': window(before, nights),
+            'after': window(after, nights),
+            'distance_days': distance,
+        })
+    suggestions.sort(key=lambda item: item['distance_days'])
+    return suggestions
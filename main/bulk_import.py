@@ -0,0 +1,194 @@
+"""
+Массовый импорт домиков, отзывов и фото галереи.
+
+Манифест — CSV (первая строка — заголовки) или JSON-массив объектов с
+полями модели; в колонке изображения (``image``, у отзывов ``avatar``) —
+имя файла внутри ZIP-архива. Каждая запись проверяется ModelForm, картинки
+распаковываются и сохраняются в хранилище пулом потоков (zlib и запись на
+диск отпускают GIL), затем строки вставляются ``bulk_create()`` пачками по
+BULK_IMPORT_BATCH_SIZE — каждая пачка в своей короткой транзакции.
+Ошибочные записи пропускаются и попадают в отчёт, остальные импортируются;
+картинки пачек, которые не удалось вставить, удаляются из хранилища.
+"""
+import csv
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, transaction
+from django.forms import modelform_factory
+
+from .models import GalleryImage, House, Review
+from .signals import invalidate_catalogue, invalidate_seo, rerender_pages
+
+# Что импортируется: модель, поля из манифеста, поле изображения
+IMPORTERS = {
+    'houses': (House, ['name', 'description', 'capacity', 'price_per_night', 'is_available'], 'image'),
+    'reviews': (Review, ['guest_name', 'rating', 'text', 'is_approved'], 'avatar'),
+    'gallery': (GalleryImage, ['title', 'description', 'alt_text', 'is_featured', 'order'], 'image'),
+}
+
+
+def read_manifest(file, filename):
+    """Записи манифеста списком словарей; ValueError — файл не разобрать"""
+    content = file.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if filename.lower().endswith('.json'):
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f'Некорректный JSON: {exc}')
+        if not isinstance(rows, list):
+            raise ValueError('JSON-манифест должен быть массивом объектов')
+        return rows
+    if filename.lower().endswith('.csv'):
+        # Пропуски в коротких строках (None) и лишние колонки (ключ None) отбрасываем
+        return [
+            {key: value for key, value in row.items() if key is not None and value is not None}
+            for row in csv.DictReader(io.StringIO(content))
+        ]
+    raise ValueError('Манифест должен быть файлом .csv или .json')
+
+
+def validate_rows(kind, rows):
+    """
+    Проверяет записи манифеста. Возвращает ([(номер, объект, имя файла)], {номер: ошибка});
+    объекты ещё не сохранены, номер записи начинается с 1.
+    """
+    model, fields, image_field = IMPORTERS[kind]
+    form_class = modelform_factory(model, fields=fields)
+    image_required = not model._meta.get_field(image_field).blank
+    valid, errors = [], {}
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors[number] = 'запись должна быть объектом'
+            continue
+        row = {key.strip(): value.strip() if isinstance(value, str) else value for key, value in row.items()}
+        # Отсутствующие колонки получают значения по умолчанию модели (галочка
+        # «доступен» без колонки не должна превращаться в False)
+        data = {}
+        for name in fields:
+            field = model._meta.get_field(name)
+            if name in row:
+                data[name] = row[name]
+            elif field.has_default():
+                data[name] = field.get_default()
+        form = form_class(data)
+        if not form.is_valid():
+            errors[number] = '; '.join(
+                f'{name}: {" ".join(messages)}' for name, messages in form.errors.items()
+            )
+            continue
+        image_name = row.get(image_field) or ''
+        if image_required and not image_name:
+            errors[number] = f'{image_field}: не указано изображение'
+            continue
+        valid.append((number, form.save(commit=False), image_name))
+    return valid, errors
+
+
+def store_image(archive, name, field):
+    """Читает файл из архива, проверяет, что это изображение, и сохраняет в хранилище поля"""
+    from PIL import Image
+
+    info = archive.getinfo(name)
+    if info.file_size > settings.BULK_IMPORT_MAX_IMAGE_SIZE:
+        raise ValueError(f'файл {name} больше {settings.BULK_IMPORT_MAX_IMAGE_SIZE // (1024 * 1024)} МБ')
+    data = archive.read(info)
+    try:
+        Image.open(io.BytesIO(data)).verify()
+    except Exception:
+        raise ValueError(f'файл {name} не является изображением')
+    filename = field.generate_filename(None, name.rsplit('/', 1)[-1])
+    return field.storage.save(filename, ContentFile(data))
+
+
+def extract_images(archive, names, field, workers):
+    """Сохраняет файлы names из архива параллельно: ({имя: имя в хранилище}, {имя: ошибка})"""
+    stored, errors = {}, {}
+    available = set(archive.namelist())
+    for name in names:
+        if name not in available:
+            errors[name] = f'файла {name} нет в архиве'
+    pending = [name for name in names if name not in errors]
+    # ZipFile разрешает читать разные файлы архива из нескольких потоков
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(store_image, archive, name, field) for name in pending}
+        for name, future in futures.items():
+            try:
+                stored[name] = future.result()
+            except (ValueError, OSError, zipfile.BadZipFile) as exc:
+                errors[name] = str(exc)
+    return stored, errors
+
+
+def discard_images(model, image_field, names):
+    """
+    Удаляет из хранилища файлы записей, не попавших в базу. Имена файлов —
+    хэш содержимого, поэтому тот же файл может принадлежать уже
+    существующей строке: такие не трогаем.
+    """
+    if not names:
+        return
+    used = set(model.objects.filter(**{f'{image_field}__in': names}).values_list(image_field, flat=True))
+    storage = model._meta.get_field(image_field).storage
+    for name in names - used:
+        storage.delete(name)
+
+
+def import_catalogue(kind, manifest, manifest_name, images=None, batch_size=None, workers=None):
+    """
+    Импортирует записи манифеста. images — ZIP-архив (путь или файловый
+    объект) с изображениями. Возвращает {'created': число, 'errors': [(номер записи, ошибка)]};
+    ValueError — манифест или архив нельзя прочитать целиком.
+    """
+    model, fields, image_field = IMPORTERS[kind]
+    batch_size = batch_size or settings.BULK_IMPORT_BATCH_SIZE
+    workers = workers or settings.BULK_IMPORT_WORKERS
+
+    valid, errors = validate_rows(kind, read_manifest(manifest, manifest_name))
+    names = sorted({image_name for _, _, image_name in valid if image_name})
+    stored, image_errors = {}, {}
+    if names and images is None:
+        image_errors = {name: 'не передан архив с изображениями' for name in names}
+    elif names:
+        try:
+            archive = zipfile.ZipFile(images)
+        except zipfile.BadZipFile:
+            raise ValueError('Архив изображений не является ZIP-файлом')
+        with archive:
+            stored, image_errors = extract_images(archive, names, model._meta.get_field(image_field), workers)
+
+    instances = []
+    for number, instance, image_name in valid:
+        if image_name in image_errors:
+            errors[number] = f'{image_field}: {image_errors[image_name]}'
+            continue
+        if image_name:
+            setattr(instance, image_field, stored[image_name])
+        instances.append((number, instance))
+
+    created, orphans = 0, set()
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([instance for _, instance in batch])
+        except DatabaseError as exc:
+            errors.update((number, f'ошибка базы данных: {exc}') for number, _ in batch)
+            orphans.update(getattr(instance, image_field).name for _, instance in batch
+                           if getattr(instance, image_field))
+        else:
+            created += len(batch)
+    discard_images(model, image_field, orphans)
+
+    if created:
+        # bulk_create() не шлёт post_save — сбрасываем кэши вручную
+        invalidate_catalogue(model)
+        invalidate_seo(model)
+        rerender_pages(model)
+    return {'created': created, 'errors': sorted(errors.items())}
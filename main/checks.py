@@ -0,0 +1,67 @@
+"""
+Системные проверки развёртывания (``manage.py check --deploy``).
+
+Состояние, которое должно быть общим для всех воркеров gunicorn, нельзя
+держать в кэше в памяти процесса: с WEB_CONCURRENCY=N каждый воркер
+видит только свои счётчики. Лимитам запросов нужен ещё и атомарный
+``incr`` (Redis, Memcached) вне основной базы: DatabaseCache превратил бы
+каждый запрос к API, включая отклонённые, в запись в SQLite бронирований.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+DATABASE_CACHE = 'django.core.cache.backends.db.DatabaseCache'
+# incr у этих бэкендов — get + set без блокировки
+NON_ATOMIC_CACHES = {
+    DATABASE_CACHE,
+    'django.core.cache.backends.filebased.FileBasedCache',
+}
+REDIS_HINT = 'Укажите Redis: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://...'
+
+
+def cache_backend(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND')
+
+
+def is_process_local(alias):
+    return cache_backend(alias) in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    ratelimit_backend = cache_backend(settings.RATELIMIT_CACHE)
+    if settings.RATELIMIT_ENABLED and ratelimit_backend in PROCESS_LOCAL_CACHES:
+        errors.append(Error(
+            f'Лимиты запросов хранятся в кэше "{settings.RATELIMIT_CACHE}" в памяти процесса: '
+            'у каждого воркера свои счётчики, и реальный лимит в N раз выше заданного.',
+            hint=REDIS_HINT,
+            id='main.E001',
+        ))
+    elif settings.RATELIMIT_ENABLED and ratelimit_backend == DATABASE_CACHE:
+        errors.append(Error(
+            f'Лимиты запросов хранятся в DatabaseCache "{settings.RATELIMIT_CACHE}": каждый запрос '
+            'к API, включая ответы 429, пишет в базу бронирований.',
+            hint=REDIS_HINT,
+            id='main.E003',
+        ))
+    elif settings.RATELIMIT_ENABLED and ratelimit_backend in NON_ATOMIC_CACHES:
+        errors.append(Warning(
+            f'У кэша лимитов "{settings.RATELIMIT_CACHE}" incr не атомарен: '
+            'параллельные запросы могут пройти сверх лимита.',
+            hint=REDIS_HINT,
+            id='main.W001',
+        ))
+    if is_process_local('default'):
+        errors.append(Error(
+            'Версии кэша каталога (main/api.py) хранятся в кэше "default" в памяти процесса: '
+            'изменение домика в одном воркере не сбрасывает кэш остальных.',
+            hint='Укажите общий кэш через CACHE_BACKEND/CACHE_LOCATION: Redis или '
+                 'FileBasedCache в каталоге, общем для воркеров.',
+            id='main.E002',
+        ))
+    return errors
@@ -0,0 +1,139 @@
+"""
+Чтение публичных страниц с реплик.
+
+``ReplicaRouter`` отправляет запросы на чтение по кругу на реплики из
+``settings.DATABASE_REPLICAS``, пропуская недоступные, а запись — всегда в
+основную базу (``default``). На основную базу читают также админка и
+служебные приложения (``REPLICA_PRIMARY_APPS``), запросы на запись и
+посетители, которые только что что-то записали: ``ReplicaRoutingMiddleware``
+(main/middleware.py) ставит им cookie на ``REPLICA_STICKY_SECONDS``, чтобы
+после бронирования страница booking_success увидела новую запись, даже
+если реплика ещё отстаёт. Кэши (каталог, SEO, список домиков, пре-рендер)
+пересобираются с основной базы (``on_primary``).
+"""
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# Состояние текущего запроса: {'primary': читать с основной базы, 'wrote': была запись}.
+# Словарь изменяется на месте, поэтому запись из потока sync_to_async
+# видна и async-коду того же запроса.
+request_state = ContextVar('replica_request_state', default=None)
+
+
+@contextmanager
+def routing_state(primary=False):
+    state = {'primary': primary, 'wrote': False}
+    token = request_state.set(state)
+    try:
+        yield state
+    finally:
+        request_state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную базу"""
+    with routing_state(primary=True) as state:
+        yield state
+
+
+def on_primary(func):
+    """
+    func, читающая с основной базы. Для пересборки кэшей после сброса версии:
+    отставшая реплика отдала бы старые данные, и они легли бы в кэш под новым
+    ключом на весь срок хранения.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_primary():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaHealth:
+    """
+    Доступность реплик в процессе. Реплика проверяется запросом к
+    django_migrations не чаще раза в REPLICA_HEALTH_CHECK_INTERVAL секунд;
+    недоступная пропускается до следующей проверки.
+    """
+
+    def __init__(self):
+        self.checked = {}  # alias -> (время проверки, доступна)
+
+    def is_healthy(self, alias):
+        checked_at, healthy = self.checked.get(alias, (None, False))
+        if checked_at is None or time.monotonic() - checked_at >= settings.REPLICA_HEALTH_CHECK_INTERVAL:
+            healthy = self.check(alias)
+            self.checked[alias] = (time.monotonic(), healthy)
+        return healthy
+
+    def check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+            return True
+        except Exception as exc:
+            logger.warning('Реплика %s недоступна: %s', alias, exc)
+            return False
+
+    def mark_down(self, alias):
+        self.checked[alias] = (time.monotonic(), False)
+
+    def mark_up(self, alias):
+        self.checked[alias] = (time.monotonic(), True)
+
+    def reset(self):
+        self.checked.clear()
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.counter = itertools.count()
+
+    def pinned_to_primary(self, model):
+        if model._meta.app_label in settings.REPLICA_PRIMARY_APPS:
+            return True
+        state = request_state.get()
+        if state and (state['primary'] or state['wrote']):
+            return True
+        # Чтение внутри транзакции записи должно видеть её же изменения
+        return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or self.pinned_to_primary(model):
+            return DEFAULT_DB_ALIAS
+        for _ in range(len(replicas)):
+            alias = replicas[next(self.counter) % len(replicas)]
+            if health.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        # Модели REPLICA_PRIMARY_APPS (сессии, DatabaseCache) и так читаются с
+        # основной базы: их запись не должна включать sticky-cookie
+        if state is not None and model._meta.app_label not in settings.REPLICA_PRIMARY_APPS:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,57 @@
+"""
+Декораторы представлений, работающие и с sync-, и с async-views.
+
+Django 4.2 ``csrf_exempt`` и ``require_http_methods`` оборачивают view
+в синхронную функцию, из-за чего async-view превращается в sync и
+выполняется через лишний переход между потоками.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponseNotAllowed
+from django.utils.log import log_response
+
+
+def csrf_exempt(view_func):
+    """Освобождает view от проверки CSRF, сохраняя его sync/async-природу"""
+    if iscoroutinefunction(view_func):
+        async def wrapper_view(*args, **kwargs):
+            return await view_func(*args, **kwargs)
+    else:
+        def wrapper_view(*args, **kwargs):
+            return view_func(*args, **kwargs)
+
+    wrapper_view = wraps(view_func)(wrapper_view)
+    wrapper_view.csrf_exempt = True
+    return wrapper_view
+
+
+def require_http_methods(request_method_list):
+    """Пропускает во view только перечисленные HTTP-методы"""
+
+    def not_allowed(request):
+        response = HttpResponseNotAllowed(request_method_list)
+        log_response(
+            "Method Not Allowed (%s): %s",
+            request.method,
+            request.path,
+            response=response,
+            request=request,
+        )
+        return response
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+            async def inner(request, *args, **kwargs):
+                if request.method not in request_method_list:
+                    return not_allowed(request)
+                return await func(request, *args, **kwargs)
+        else:
+            def inner(request, *args, **kwargs):
+                if request.method not in request_method_list:
+                    return not_allowed(request)
+                return func(request, *args, **kwargs)
+
+        return wraps(func)(inner)
+
+    return decorator
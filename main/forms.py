@@ -1,7 +1,10 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import transaction
 from django.utils import timezone
-from .models import Booking
+from .house_choices import get_house_choice, house_choices
+from .models import Booking, House
 
 
 class BookingForm(forms.ModelForm):
@@ -9,7 +12,8 @@ class BookingForm(forms.ModelForm):
     
     class Meta:
         model = Booking
-        fields = ['house', 'guest_name', 'guest_phone', 'guest_email', 
+        # house — объявленное поле ниже, в экземпляр его переносит save()
+        fields = ['guest_name', 'guest_phone', 'guest_email',
                  'check_in_date', 'check_out_date', 'guests_count', 'special_requests']
         widgets = {
             'check_in_date': forms.DateInput(attrs={
@@ -42,21 +46,42 @@ class BookingForm(forms.ModelForm):
                 'rows': 3,
                 'placeholder': 'Особые пожелания (необязательно)'
             }),
-            'house': forms.Select(attrs={
-                'class': 'form-control'
-            })
         }
 
+    # Варианты берутся из кэшированного списка доступных домиков
+    # (main/house_choices.py), а не запросом ModelChoiceField. Кэш служит
+    # только для показа формы и подсказок; цену и доступность save()
+    # перечитывает из базы
+    house = forms.TypedChoiceField(
+        label='Домик',
+        coerce=int,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Фильтруем только доступные домики
-        self.fields['house'].queryset = self.fields['house'].queryset.filter(is_available=True)
+        self.house_choices = house_choices()
+        self.fields['house'].choices = [('', '---------')] + [
+            (choice['id'], f"{choice['name']} ({choice['capacity']} мест)") for choice in self.house_choices
+        ]
+        # Варианты количества гостей — в пределах валидаторов Booking.guests_count
+        limits = {type(validator): validator.limit_value
+                  for validator in Booking._meta.get_field('guests_count').validators}
+        self.fields['guests_count'].widget.choices = [
+            (count, count) for count in range(limits[MinValueValidator], limits[MaxValueValidator] + 1)
+        ]
         
         # Добавляем CSS классы для валидации
         for field_name, field in self.fields.items():
             if field.required:
                 field.widget.attrs['class'] = field.widget.attrs.get('class', '') + ' required'
 
+    def clean_house(self):
+        choice = get_house_choice(self.cleaned_data['house'])
+        if choice is None:
+            raise ValidationError('Выберите доступный домик')
+        return choice
+
     def clean(self):
         cleaned_data = super().clean()
         check_in_date = cleaned_data.get('check_in_date')
@@ -78,21 +103,39 @@ class BookingForm(forms.ModelForm):
 
         # Проверка вместимости домика
         if house and guests_count:
-            if guests_count > house.capacity:
-                raise ValidationError(f"Домик '{house.name}' вмещает максимум {house.capacity} человек")
+            if guests_count > house['capacity']:
+                raise ValidationError(f"Домик '{house['name']}' вмещает максимум {house['capacity']} человек")
 
         return cleaned_data
 
     def save(self, commit=True):
+        """
+        Цена и вместимость в кэше могли устареть, поэтому перед записью они
+        читаются одним запросом по заблокированной строке домика.
+        ValidationError — домик стал недоступен или вмещает меньше гостей.
+        """
         instance = super().save(commit=False)
-        
-        # Автоматически рассчитываем общую стоимость
-        if instance.check_in_date and instance.check_out_date and instance.house:
-            nights = (instance.check_out_date - instance.check_in_date).days
-            instance.total_price = instance.house.price_per_night * nights
-        
-        if commit:
-            instance.save()
+        house = self.cleaned_data['house']
+
+        with transaction.atomic():
+            row = (
+                House.objects.select_for_update()
+                .filter(pk=house['id'], is_available=True)
+                .values_list('price_per_night', 'capacity')
+                .first()
+            )
+            if row is None:
+                raise ValidationError(f"Домик '{house['name']}' больше недоступен для бронирования")
+            price_per_night, capacity = row
+            if instance.guests_count > capacity:
+                raise ValidationError(f"Домик '{house['name']}' вмещает максимум {capacity} человек")
+
+            # Автоматически рассчитываем общую стоимость
+            instance.house_id = house['id']
+            instance.total_price = price_per_night * instance.nights
+
+            if commit:
+                instance.save()
         return instance
 
 
@@ -139,3 +182,21 @@ class ContactForm(forms.Form):
             raise ValidationError("Введите корректный номер телефона")
         return phone
 
+
+class BulkImportForm(forms.Form):
+    """Загрузка манифеста и архива изображений для импорта в админке"""
+    manifest = forms.FileField(
+        label='Манифест',
+        help_text='CSV (первая строка — названия полей) или JSON-массив объектов',
+    )
+    images = forms.FileField(
+        required=False,
+        label='Архив изображений',
+        help_text='ZIP с файлами, указанными в манифесте',
+    )
+
+    def clean_manifest(self):
+        manifest = self.cleaned_data['manifest']
+        if not manifest.name.lower().endswith(('.csv', '.json')):
+            raise ValidationError('Манифест должен быть файлом .csv или .json')
+        return manifest
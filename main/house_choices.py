@@ -0,0 +1,48 @@
+"""
+Кэшированный список доступных домиков для формы бронирования.
+
+Один запрос ``values_list`` на всё время жизни версии каталога домиков
+(её сдвигают сигналы House, см. main/signals.py): из этого списка строятся
+варианты выбора в форме, JSON для расчёта цены в браузере, проверка
+вместимости при отправке и ответ API calculate-price. Всё это — показ и
+предварительный расчёт: сумму бронирования BookingForm.save() считает по
+цене из базы.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .db_router import on_primary
+from .models import House
+
+CHOICE_FIELDS = ('id', 'name', 'capacity', 'price_per_night')
+
+
+def house_choices():
+    """[{id, name, capacity, price_per_night}] доступных домиков в порядке House.Meta.ordering"""
+    # api импортирует views -> forms -> этот модуль, поэтому импорт здесь
+    from .api import catalogue_version
+
+    def build():
+        houses = House.objects.filter(is_available=True).values_list(*CHOICE_FIELDS)
+        return [dict(zip(CHOICE_FIELDS, row)) for row in houses]
+
+    key = f"booking:houses:{catalogue_version('houses')}"
+    return cache.get_or_set(key, on_primary(build), settings.CATALOGUE_CACHE_TIMEOUT)
+
+
+def get_house_choice(house_id):
+    """Домик из кэшированного списка или None, если его нет или он недоступен"""
+    try:
+        house_id = int(house_id)
+    except (TypeError, ValueError):
+        return None
+    return next((choice for choice in house_choices() if choice['id'] == house_id), None)
+
+
+aget_house_choice = sync_to_async(get_house_choice)
+
+
+def choices_json(choices):
+    """Данные для json_script на странице бронирования"""
+    return [{**choice, 'price_per_night': str(choice['price_per_night'])} for choice in choices]
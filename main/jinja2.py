@@ -0,0 +1,69 @@
+"""
+Окружение Jinja2 для публичных страниц (TEMPLATE_ENGINE=jinja2).
+
+Шаблоны лежат в jinja2/ и повторяют templates/ один к одному; здесь —
+аналоги используемых там тегов и фильтров Django. Скомпилированные
+шаблоны кэшируются в памяти процесса и на диске (bytecode cache), так что
+новый воркер не разбирает их заново.
+"""
+import hashlib
+from pathlib import Path
+
+from crispy_forms.templatetags.crispy_forms_filters import as_crispy_field
+from django.conf import settings
+from django.template.defaultfilters import date, truncatewords
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import dateformat, timezone
+from django.utils.formats import localize
+from django.utils.html import json_script
+from jinja2 import Environment, FileSystemBytecodeCache, Undefined
+
+from .seo import house_json_ld, resort_json_ld
+from .templatetags.assets import scripts, stylesheets
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def now(format_string):
+    return dateformat.format(timezone.localtime(), format_string)
+
+
+def bytecode_cache():
+    # Ключ кэша Jinja2 учитывает только исходник шаблона, а скомпилированный
+    # код зависит и от настроек окружения (finalize и т.д.) — добавляем в имя
+    # файлов хэш этого модуля, чтобы после его изменения кэш не подхватывался
+    fingerprint = hashlib.md5(Path(__file__).read_bytes(), usedforsecurity=False).hexdigest()[:8]
+    return FileSystemBytecodeCache(
+        settings.JINJA2_BYTECODE_CACHE_DIR or None,
+        pattern=f'altai-{fingerprint}-%s.cache',
+    )
+
+
+def environment(**options):
+    options.setdefault('bytecode_cache', bytecode_cache())
+    # Как в Django-шаблонах: отсутствующая переменная выводится пустой строкой
+    # (бэкенд Django под DEBUG подставляет DebugUndefined)
+    options['undefined'] = Undefined
+    # Числа и даты выводятся с локализацией, как в Django-шаблонах
+    options.setdefault('finalize', localize)
+    options.setdefault('keep_trailing_newline', True)
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'now': now,
+        'stylesheets': stylesheets,
+        'scripts': scripts,
+        'resort_json_ld': resort_json_ld,
+        'house_json_ld': house_json_ld,
+    })
+    env.filters.update({
+        'as_crispy_field': as_crispy_field,
+        'date': date,
+        'json_script': json_script,
+        'truncatewords': truncatewords,
+    })
+    return env
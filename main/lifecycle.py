@@ -0,0 +1,93 @@
+"""
+Пакетные задачи жизненного цикла бронирований.
+
+Все переходы выполняются пачками по ``chunk_size`` строк: каждая пачка —
+отдельная короткая транзакция с ``update()``/``bulk_create()``, чтобы не
+держать блокировку записи SQLite дольше нескольких миллисекунд. Ключи пачки
+выбираются до транзакции, поэтому внутри неё условие отбора (статус, даты)
+проверяется заново: бронирование, которое успели подтвердить или изменить,
+не будет отменено или перенесено в архив.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, BookingArchive
+
+ARCHIVE_FIELDS = [field.attname for field in Booking._meta.concrete_fields]
+
+
+def months_ago(today, months):
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    return datetime.date(year, month + 1, min(today.day, 28))
+
+
+def chunked_ids(queryset, chunk_size):
+    """Первичные ключи очередной пачки, пока они есть"""
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+
+
+def transition(queryset, status, chunk_size):
+    """Переводит строки queryset в status пачками, возвращает их число"""
+    total = 0
+    for ids in chunked_ids(queryset, chunk_size):
+        with transaction.atomic():
+            total += queryset.filter(pk__in=ids).update(status=status, updated_at=timezone.now())
+    return total
+
+
+def complete_finished(today, chunk_size):
+    """Подтверждённые бронирования после даты выезда -> completed"""
+    return transition(
+        Booking.objects.filter(status='confirmed', check_out_date__lt=today),
+        'completed', chunk_size,
+    )
+
+
+def expire_holds(now, chunk_size):
+    """
+    Неподтверждённые заявки -> cancelled: если дата заезда уже прошла или
+    заявка висит дольше BOOKING_HOLD_HOURS (0 — только по дате заезда).
+    """
+    expired = Booking.objects.filter(status='pending', check_in_date__lt=now.date())
+    total = transition(expired, 'cancelled', chunk_size)
+    if settings.BOOKING_HOLD_HOURS:
+        stale = Booking.objects.filter(
+            status='pending', created_at__lt=now - datetime.timedelta(hours=settings.BOOKING_HOLD_HOURS),
+        )
+        total += transition(stale, 'cancelled', chunk_size)
+    return total
+
+
+def archive_old(today, months, chunk_size):
+    """Переносит завершённые и отменённые бронирования старше months месяцев в архив"""
+    queryset = Booking.objects.filter(
+        status__in=['completed', 'cancelled'], check_out_date__lt=months_ago(today, months),
+    )
+    total = 0
+    for ids in chunked_ids(queryset, chunk_size):
+        with transaction.atomic():
+            rows = list(queryset.filter(pk__in=ids).select_for_update().values(*ARCHIVE_FIELDS))
+            BookingArchive.objects.bulk_create(BookingArchive(**row) for row in rows)
+            Booking.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        total += len(rows)
+    return total
+
+
+def run_lifecycle(chunk_size=None, archive_months=None, now=None):
+    """Один проход всех задач, возвращает {задача: число строк}"""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    chunk_size = chunk_size or settings.BOOKING_BATCH_SIZE
+    archive_months = settings.BOOKING_ARCHIVE_MONTHS if archive_months is None else archive_months
+    return {
+        'completed': complete_finished(today, chunk_size),
+        'expired': expire_holds(now, chunk_size),
+        'archived': archive_old(today, archive_months, chunk_size) if archive_months else 0,
+    }
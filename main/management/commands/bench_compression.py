@@ -0,0 +1,49 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from main.middleware import Compressor, brotli
+
+PAGES = ['/', '/about/', '/houses/', '/gallery/', '/reviews/', '/contact/', '/booking/']
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает затраты CPU и экономию байт для gzip/Brotli на динамических страницах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help='Повторов сжатия на замер')
+        parser.add_argument('--gzip-levels', default='1,6,9')
+        parser.add_argument('--brotli-qualities', default='1,4,6,11')
+
+    def handle(self, *args, **options):
+        client = Client()
+        variants = [('gzip', int(level)) for level in options['gzip_levels'].split(',')]
+        if brotli is not None:
+            variants += [('br', int(quality)) for quality in options['brotli_qualities'].split(',')]
+        else:
+            self.stdout.write(self.style.WARNING('Brotli не установлен, замеряется только gzip'))
+
+        self.stdout.write(f"{'страница':<12}{'исходно':>10}  " + '  '.join(
+            f'{encoding}-{level:<2} байт / мс'.rjust(22) for encoding, level in variants
+        ))
+        for path in PAGES:
+            with override_settings(COMPRESSION_ENABLED=False):
+                body = client.get(path, HTTP_HOST='localhost').content
+            columns = []
+            for encoding, level in variants:
+                size, elapsed = self.measure(body, encoding, level, options['repeat'])
+                columns.append(f'{size:>8} ({100 - size * 100 // len(body):>2}%) / {elapsed:5.2f}'.rjust(22))
+            self.stdout.write(f'{path:<12}{len(body):>10}  ' + '  '.join(columns))
+
+    def measure(self, body, encoding, level, repeat):
+        setting = 'COMPRESSION_BROTLI_QUALITY' if encoding == 'br' else 'COMPRESSION_GZIP_LEVEL'
+        with override_settings(**{setting: level}):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                compressed = Compressor(encoding).compress_all(body)
+            elapsed = (time.perf_counter() - started) * 1000 / repeat
+        if encoding == 'gzip':
+            assert gzip.decompress(compressed) == body
+        return len(compressed), elapsed
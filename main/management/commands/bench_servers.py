@@ -0,0 +1,128 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import House
+
+API_PATHS = ['/api/check-availability/', '/api/calculate-price/']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает пропускную способность JSON API под WSGI и ASGI (gunicorn)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi', help='Режимы через запятую')
+        parser.add_argument('--clients', type=int, default=32, help='Число параллельных клиентов')
+        parser.add_argument('--requests', type=int, default=40, help='Запросов на клиента')
+        parser.add_argument('--workers', type=int, default=1, help='Воркеров gunicorn')
+
+    def handle(self, *args, **options):
+        house = House.objects.first()
+        if house is None:
+            raise CommandError('Для бенчмарка нужен хотя бы один домик в базе')
+        payload = json.dumps({
+            'house_id': house.id,
+            'check_in': '2030-07-01',
+            'check_out': '2030-07-05',
+        }).encode()
+
+        for mode in options['modes'].split(','):
+            port = free_port()
+            server = self.start_server(mode.strip(), port, options['workers'])
+            try:
+                self.wait_ready(port)
+                result = self.run_clients(port, payload, options['clients'], options['requests'])
+            finally:
+                server.terminate()
+                server.wait(10)
+            if result['ok']:
+                self.stdout.write(
+                    f"{mode:>5}: {result['rps']:8.1f} req/s  "
+                    f"p50 {result['p50']:6.1f} мс  p95 {result['p95']:6.1f} мс  "
+                    f"2xx {result['ok']}"
+                )
+            else:
+                self.stdout.write(f'{mode:>5}: ни одного ответа 2xx')
+            if result['statuses'] or result['errors']:
+                statuses = ', '.join(f'{status}: {count}' for status, count in sorted(result['statuses'].items()))
+                self.stdout.write(self.style.WARNING(
+                    f"       не 2xx {statuses or '—'}  ошибок соединения {result['errors']}"
+                ))
+
+    def start_server(self, mode, port, workers):
+        # Лимиты API выключены: иначе бенчмарк мерил бы скорость ответов 429/503
+        env = dict(
+            os.environ, SERVER_MODE=mode, PORT=str(port), WEB_CONCURRENCY=str(workers),
+            RATELIMIT_ENABLED='False', API_MAX_CONCURRENT='0',
+        )
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+
+    def wait_ready(self, port, timeout=20):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Сервер на порту {port} не запустился')
+
+    def run_clients(self, port, payload, clients, requests_per_client):
+        def client(index):
+            latencies, statuses, errors = [], Counter(), 0
+            for n in range(requests_per_client):
+                path = API_PATHS[(index + n) % len(API_PATHS)]
+                request = urllib.request.Request(
+                    f'http://127.0.0.1:{port}{path}',
+                    data=payload,
+                    headers={'Content-Type': 'application/json'},
+                )
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                except urllib.error.HTTPError as error:
+                    # Ответы не 2xx считаются отдельно и не входят в задержки
+                    statuses[error.code] += 1
+                    continue
+                except (urllib.error.URLError, OSError):
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+            return latencies, statuses, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(client, range(clients)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for result in results for latency in result[0])
+        return {
+            'ok': len(latencies),
+            'rps': len(latencies) / elapsed,
+            'p50': statistics.median(latencies) if latencies else None,
+            'p95': latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else None,
+            'statuses': sum((result[1] for result in results), Counter()),
+            'errors': sum(result[2] for result in results),
+        }
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from main.models import House
+
+PAGES = ['/', '/about/', '/houses/', '/gallery/', '/reviews/', '/contact/', '/booking/']
+
+ENGINES = {
+    'django': [settings.DJANGO_TEMPLATES],
+    'jinja2': [settings.JINJA2_TEMPLATES, settings.DJANGO_TEMPLATES],
+}
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время ответа публичных страниц с Django-шаблонами и Jinja2'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=100, help='Запросов на страницу')
+
+    def handle(self, *args, **options):
+        try:
+            import jinja2  # noqa: F401
+        except ImportError:
+            raise CommandError('Jinja2 не установлен (pip install Jinja2)')
+
+        pages = list(PAGES)
+        house_id = House.objects.filter(is_available=True).values_list('id', flat=True).first()
+        if house_id:
+            pages.append(f'/houses/{house_id}/')
+
+        # Страницы отдаются представлениями, без пре-рендера и сжатия:
+        # запросы к базе одинаковы, разница — время рендеринга шаблонов
+        results = {}
+        for engine, templates in ENGINES.items():
+            with override_settings(TEMPLATES=templates, PRERENDER_ENABLED=False, COMPRESSION_ENABLED=False):
+                client = Client()
+                for path in pages:
+                    results[engine, path] = self.measure(client, path, options['repeat'])
+
+        self.stdout.write(f"{'страница':<14}{'django: 1-й / мс':>20}{'jinja2: 1-й / мс':>20}{'ускорение':>12}")
+        for path in pages:
+            django_first, django_ms = results['django', path]
+            jinja_first, jinja_ms = results['jinja2', path]
+            self.stdout.write(
+                f'{path:<14}{django_first:>9.2f} / {django_ms:<8.2f}{jinja_first:>9.2f} / {jinja_ms:<8.2f}'
+                f'{django_ms / jinja_ms:>11.2f}x'
+            )
+
+    def measure(self, client, path, repeat):
+        """(время первого запроса, среднее время последующих) в мс"""
+        started = time.perf_counter()
+        response = client.get(path, HTTP_HOST='localhost', secure=True)
+        first = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise CommandError(f'{path}: статус {response.status_code}')
+        started = time.perf_counter()
+        for _ in range(repeat):
+            client.get(path, HTTP_HOST='localhost', secure=True)
+        return first, (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.lifecycle import run_lifecycle
+
+
+class Command(BaseCommand):
+    help = 'Завершает прошедшие бронирования, снимает просроченные заявки и архивирует старые'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help='Строк в одной транзакции')
+        parser.add_argument('--archive-months', type=int,
+                            help='Архивировать бронирования старше N месяцев (0 — не архивировать)')
+        parser.add_argument('--loop', action='store_true', help='Работать в цикле')
+        parser.add_argument('--interval', type=int, default=3600, help='Пауза между проходами в цикле (сек)')
+
+    def handle(self, *args, **options):
+        while True:
+            result = run_lifecycle(options['chunk_size'], options['archive_months'])
+            self.stdout.write(
+                f"Завершено: {result['completed']}, снято заявок: {result['expired']}, "
+                f"в архиве: {result['archived']}"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
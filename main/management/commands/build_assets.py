@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.assets import BUNDLES, build_all, extract_inline_styles
+
+
+class Command(BaseCommand):
+    help = 'Собирает минифицированные бандлы CSS/JS и critical CSS (запускать перед collectstatic)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--extract-inline', action='store_true',
+            help='Перенести инлайновые <style> из шаблонов в static/css/pages/',
+        )
+
+    def handle(self, *args, **options):
+        if options['extract_inline']:
+            static_dir = Path(settings.BASE_DIR) / 'static'
+            for template in sorted((Path(settings.BASE_DIR) / 'templates' / 'main').glob('*.html')):
+                static_name = extract_inline_styles(template, static_dir)
+                if static_name:
+                    self.stdout.write(f'{template.name}: стили вынесены в {static_name}')
+                    if f'pages/{template.stem}.css' not in BUNDLES:
+                        self.stdout.write(self.style.WARNING(
+                            f"Добавьте 'pages/{template.stem}.css': ['{static_name}'] в BUNDLES (main/assets.py)"
+                        ))
+
+        for path, size in build_all(settings.ASSETS_BUILD_DIR):
+            self.stdout.write(f'{path}: {size / 1024:.1f} КБ')
+        self.stdout.write(self.style.SUCCESS('Готово. Теперь выполните collectstatic.'))
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.bulk_import import IMPORTERS, import_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Импортирует домики, отзывы или фото галереи из CSV/JSON-манифеста и ZIP-архива изображений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS), help='Что импортировать')
+        parser.add_argument('manifest', help='Манифест .csv или .json')
+        parser.add_argument('--images', help='ZIP-архив с изображениями из манифеста')
+        parser.add_argument('--batch-size', type=int, help='Строк в одном bulk_create')
+        parser.add_argument('--workers', type=int, help='Потоков для распаковки изображений')
+
+    def handle(self, *args, **options):
+        manifest = Path(options['manifest'])
+        try:
+            with manifest.open('rb') as file:
+                result = import_catalogue(
+                    options['kind'], file, manifest.name, images=options['images'],
+                    batch_size=options['batch_size'], workers=options['workers'],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for number, message in result['errors']:
+            self.stdout.write(self.style.WARNING(f'Запись {number}: {message}'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Импортировано: {result['created']}, с ошибками: {len(result['errors'])}"
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from main.startup import pending_migrations
+
+
+class Command(BaseCommand):
+    help = 'Запускает migrate, только если есть неприменённые миграции, и создаёт таблицу DatabaseCache'
+    # Системные проверки (и импорт Pillow ради ImageField) на каждом старте не нужны:
+    # они выполнялись при сборке, а migrate при необходимости проверит сам
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        pending = pending_migrations(options['database'])
+        if pending:
+            self.stdout.write(f'Неприменённых миграций: {len(pending)}')
+            call_command('migrate', database=options['database'], interactive=False, verbosity=options['verbosity'])
+        else:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(f'Миграции применены, проверка заняла {elapsed:.0f} мс')
+        # Общий кэш в базе (лимиты запросов, версии каталога); для других бэкендов ничего не делает
+        call_command('createcachetable', database=options['database'], verbosity=0)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.prerender import PRERENDER_PAGES, prerender
+
+
+class Command(BaseCommand):
+    help = 'Пре-рендерит маркетинговые страницы в статический HTML'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url_names', nargs='*', help='Имена URL (по умолчанию все: %s)' % ', '.join(PRERENDER_PAGES))
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options['url_names'] if name not in PRERENDER_PAGES]
+        if unknown:
+            raise CommandError('Неизвестные страницы: %s' % ', '.join(unknown))
+        manifest = prerender(options['url_names'])
+        for path, entry in sorted(manifest.items()):
+            self.stdout.write(f"{path} -> {entry['file']}")
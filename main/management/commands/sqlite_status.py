@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Показывает активный профиль PRAGMA и режим транзакций SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Алиас базы данных')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not hasattr(connection, 'get_pragma_status'):
+            raise CommandError(
+                f"База '{options['database']}' не использует бэкенд altai_resort.sqlite"
+            )
+
+        self.stdout.write(f"Файл: {connection.settings_dict['NAME']}")
+        self.stdout.write(f"Режим транзакций записи: BEGIN {connection.transaction_mode}")
+        for name, value in connection.get_pragma_status().items():
+            configured = connection.pragmas.get(name)
+            suffix = f" (настроено: {configured})" if configured is not None else ''
+            self.stdout.write(f"  {name} = {value}{suffix}")
@@ -0,0 +1,63 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SCRIPT = 'import json, sys; from main.startup import profile_startup; print(json.dumps(profile_startup(sys.argv[1])))'
+
+
+class Command(BaseCommand):
+    help = 'Замеряет холодный старт: загрузку приложений и время до первого байта'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Холодных запусков (берётся медиана)')
+        parser.add_argument('--path', default='/', help='Страница первого запроса')
+        parser.add_argument('--check', action='store_true',
+                            help='Ошибка, если медиана TTFB больше STARTUP_TTFB_TARGET_MS')
+
+    def handle(self, *args, **options):
+        runs = [self.cold_run(options['path']) for _ in range(options['runs'])]
+
+        def median(getter):
+            return statistics.median(getter(run) for run in runs)
+
+        self.stdout.write(f"{'приложение':<20}{'импорт':>10}{'модели':>10}{'ready()':>10}  мс")
+        for label in runs[0]['apps']:
+            columns = ''.join(
+                f"{median(lambda run: run['apps'][label][phase]):>10.1f}" for phase in ('import', 'models', 'ready')
+            )
+            self.stdout.write(f'{label:<20}{columns}')
+
+        self.stdout.write('')
+        for key, title in [
+            ('settings', 'настройки'),
+            ('setup', 'django.setup()'),
+            ('handler', 'WSGI-обработчик'),
+            ('first_request', f"первый запрос {options['path']}"),
+        ]:
+            self.stdout.write(f'{title:<30}{median(lambda run: run[key]):>8.1f} мс')
+
+        ttfb = median(lambda run: run['ttfb'])
+        target = settings.STARTUP_TTFB_TARGET_MS
+        style = self.style.SUCCESS if ttfb <= target else self.style.ERROR
+        self.stdout.write(style(f"{'TTFB после холодного старта':<30}{ttfb:>8.1f} мс (цель {target} мс)"))
+        if runs[0]['pillow_loaded']:
+            self.stdout.write(self.style.WARNING('Pillow загружен до первого ответа'))
+        if options['check'] and ttfb > target:
+            raise CommandError(f'TTFB {ttfb:.0f} мс больше цели {target} мс')
+
+    def cold_run(self, path):
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT, path],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr else 'ошибка запуска')
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        if run['status'] != 200:
+            raise CommandError(f"{path}: статус {run['status']}")
+        return run
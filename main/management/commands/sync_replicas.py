@@ -0,0 +1,42 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from main.db_router import health
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную SQLite-базу в файлы реплик (SQLITE_REPLICA_PATHS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Повторять копирование каждые --interval секунд')
+        parser.add_argument('--interval', type=float, default=5, help='Пауза между копированиями (сек)')
+
+    def handle(self, *args, **options):
+        if not settings.SQLITE_REPLICA_PATHS:
+            raise CommandError('SQLITE_REPLICA_PATHS не задан')
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копирование реплик поддерживается только для SQLite')
+        while True:
+            started = time.monotonic()
+            primary.ensure_connection()
+            for path in settings.SQLITE_REPLICA_PATHS:
+                # backup API копирует постранично и под блокировками SQLite,
+                # поэтому читатели реплики видят либо старую, либо новую копию
+                target = sqlite3.connect(path)
+                try:
+                    primary.connection.backup(target)
+                finally:
+                    target.close()
+            health.reset()
+            self.stdout.write(
+                f'Реплик обновлено: {len(settings.SQLITE_REPLICA_PATHS)} '
+                f'за {(time.monotonic() - started) * 1000:.0f} мс'
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
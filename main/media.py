@@ -0,0 +1,171 @@
+"""
+Загружаемые медиафайлы: имена по содержимому и отдача в продакшне.
+
+``HashedMediaStorage`` сохраняет файл под именем из хэша содержимого
+(``houses/3f2a9c0d1e4b5a67.jpg``): одинаковые загрузки занимают на диске
+один файл, а файл под таким именем никогда не меняется — его можно
+кэшировать навсегда. ``serve_media`` отдаёт MEDIA_ROOT с
+``Cache-Control: immutable``, ETag, 304 и Range-запросами. Как уходит тело,
+зависит от режима сервера: под WSGI — через wsgi.file_wrapper (gunicorn
+отправляет его через sendfile), под ASGI — порциями из пула потоков
+(main.middleware.AsyncStreamingMiddleware; sendfile в ASGI нет). Без
+копирования через Python в обоих режимах — MEDIA_ACCEL_REDIRECT, тогда
+файл отдаёт nginx по X-Accel-Redirect.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import uuid
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+from .decorators import require_http_methods
+
+HASH_LENGTH = 16
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{%d}\.[\w]+$' % HASH_LENGTH)
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """FileSystemStorage, именующий файлы по SHA-256 содержимого"""
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        path = PurePosixPath(name)
+        return str(path.with_name(digest.hexdigest()[:HASH_LENGTH] + path.suffix.lower()))
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        # Пишем во временный файл и атомарно переименовываем: параллельная
+        # загрузка того же файла просто заменит его идентичной копией
+        directory, filename = os.path.split(name)
+        tmp_name = super()._save(os.path.join(directory, f'.{uuid.uuid4().hex}-{filename}'), content)
+        os.replace(self.path(tmp_name), self.path(name))
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя определяет _save(), занятость исходного имени не важна
+        return name
+
+
+class RangeFile:
+    """
+    Часть открытого файла для ответа 206. fileno() отдаётся как есть:
+    под WSGI gunicorn шлёт через sendfile Content-Length байт с текущей
+    позиции; под ASGI тело читается через read().
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, length) для заголовка Range с одним диапазоном, None — отдать
+    файл целиком (нет заголовка или несколько диапазонов), ValueError —
+    диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def etag_matches(header, etag):
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+@require_http_methods(['GET', 'HEAD'])
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(st.st_mode) or os.path.basename(path).startswith('.'):
+        raise Http404
+
+    hashed = bool(HASHED_NAME_RE.search(path))
+    etag = f'"{os.path.splitext(os.path.basename(path))[0]}"' if hashed else f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(st.st_mtime),
+        'Cache-Control': IMMUTABLE if hashed else f'public, max-age={settings.MEDIA_MAX_AGE}',
+        'Accept-Ranges': 'bytes',
+    }
+
+    if_none_match = request.headers.get('If-None-Match')
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if (if_none_match and etag_matches(if_none_match, etag)) or (
+        not if_none_match and if_modified_since and int(st.st_mtime) <= if_modified_since
+    ):
+        return HttpResponseNotModified(headers=headers)
+
+    # If-Range: диапазон отдаётся, только если файл не менялся
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), st.st_size)
+        except ValueError:
+            return HttpResponse(status=416, headers={**headers, 'Content-Range': f'bytes */{st.st_size}'})
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # nginx сам отдаёт файл (с sendfile и Range), заголовки кэширования — наши
+        headers['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + path
+        headers.pop('Accept-Ranges')
+        return HttpResponse(headers=headers, content_type=content_type)
+
+    if request.method == 'HEAD':
+        response = HttpResponse(status=206 if byte_range else 200, headers=headers, content_type=content_type)
+        response['Content-Length'] = byte_range[1] if byte_range else st.st_size
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, headers=headers)
+    else:
+        start, length = byte_range
+        response = FileResponse(RangeFile(file, start, length), status=206, headers=headers)
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{start + length - 1}/{st.st_size}'
+    return response
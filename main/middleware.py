@@ -0,0 +1,390 @@
+import gzip
+import secrets
+import struct
+import zlib
+from importlib import import_module
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import db_router, prerender
+
+try:
+    import brotli
+except ImportError:  # без Brotli сжимаем только gzip
+    brotli = None
+
+
+# Сколько байт синхронного streaming-ответа читать за один переход в поток
+ASYNC_STREAM_BATCH = 64 * 1024
+
+
+def next_batch(iterator, size):
+    """Следующие chunk'и итератора общим объёмом до size байт (b'' — конец)"""
+    parts, total = [], 0
+    for chunk in iterator:
+        parts.append(chunk)
+        total += len(chunk)
+        if total >= size:
+            break
+    return b''.join(parts)
+
+
+async def aiter_sync_stream(iterator):
+    iterator = iter(iterator)
+    read = sync_to_async(next_batch, thread_sensitive=False)
+    while True:
+        batch = await read(iterator, ASYNC_STREAM_BATCH)
+        if not batch:
+            return
+        yield batch
+
+
+class AsyncStreamingMiddleware:
+    """
+    Под ASGI отдаёт синхронные streaming-ответы (FileResponse медиа и статики
+    WhiteNoise, StreamingHttpResponse) асинхронным итератором.
+
+    Django 4.2 читает синхронный итератор в ASGIHandler через
+    ``sync_to_async(list)`` — всё тело целиком оказывается в памяти воркера
+    до отправки первого байта. Здесь тело читается в потоке порциями по
+    ASYNC_STREAM_BATCH и сразу уходит клиенту. Под WSGI ответ не меняется:
+    FileResponse по-прежнему идёт через wsgi.file_wrapper (sendfile).
+    Должен стоять первым в MIDDLEWARE, чтобы видеть ответы всех остальных.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming and not response.is_async:
+            # Файл закроет response.close(): FileResponse уже добавил его в _resource_closers
+            response.streaming_content = aiter_sync_stream(response.streaming_content)
+        return response
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise с поддержкой async-цепочки middleware.
+
+    Оригинальный WhiteNoiseMiddleware только синхронный, поэтому под ASGI
+    Django переключал бы каждый запрос в поток и обратно.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+def parse_accept_encoding(header):
+    """Кодировки из Accept-Encoding с ненулевым q: {'br': 1.0, 'gzip': 0.8}"""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted[name.lower()] = quality
+    return accepted
+
+
+class Compressor:
+    """Инкрементальный компрессор: каждый chunk сразу отдаётся клиенту"""
+
+    def __init__(self, encoding, random_filename=None):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self.header = b''
+        else:
+            # Сырой deflate-поток + собственный gzip-заголовок: в поле FNAME
+            # можно положить случайные байты (защита от BREACH, как в Django)
+            self.compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+            flags = gzip.FNAME if random_filename else 0
+            self.header = b'\x1f\x8b\x08' + bytes([flags]) + b'\x00\x00\x00\x00\x00\xff'
+            if random_filename:
+                self.header += random_filename + b'\x00'
+            self.crc = 0
+            self.size = 0
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self.compressor.process(chunk) + self.compressor.flush()
+        self.crc = zlib.crc32(chunk, self.crc)
+        self.size += len(chunk)
+        data = self.header + self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.header = b''
+        return data
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        trailer = struct.pack('<LL', self.crc & 0xffffffff, self.size & 0xffffffff)
+        return self.header + self.compressor.flush(zlib.Z_FINISH) + trailer
+
+    def compress_all(self, data):
+        return self.compress(data) + self.finish()
+
+
+def compress_iterator(iterator, compressor, padding=b''):
+    for chunk in iterator:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish() if not padding else compressor.compress(padding) + compressor.finish()
+
+
+async def acompress_iterator(iterator, compressor, padding=b''):
+    async for chunk in iterator:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish() if not padding else compressor.compress(padding) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Сжатие динамических ответов (Brotli или gzip по Accept-Encoding).
+
+    Маленькие, уже сжатые и несжимаемые ответы пропускаются. Streaming-ответы
+    сжимаются по мере генерации. Для HTML-страниц с CSRF-токеном длина ответа
+    маскируется случайным дополнением (BREACH): HTML-комментарием, а для gzip
+    ещё и случайным именем файла в заголовке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def choose_encoding(self, request):
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        candidates = [name for name in ('br', 'gzip') if name in accepted]
+        if brotli is None and 'br' in candidates:
+            candidates.remove('br')
+        if not candidates:
+            return None
+        return max(candidates, key=lambda name: accepted[name])
+
+    def is_compressible(self, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 206, 304):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type in settings.COMPRESSION_CONTENT_TYPES
+
+    def process_response(self, request, response):
+        if not settings.COMPRESSION_ENABLED or not self.is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request)
+        if encoding is None:
+            return response
+
+        padding, random_filename = b'', None
+        if request.META.get('CSRF_COOKIE_USED'):
+            max_padding = settings.COMPRESSION_BREACH_PADDING
+            if not max_padding:
+                return response
+            if response.get('Content-Type', '').startswith('text/html'):
+                padding = b'<!-- ' + get_random_string(secrets.randbelow(max_padding) + 1).encode() + b' -->'
+            random_filename = get_random_string(secrets.randbelow(max_padding) + 1).encode()
+
+        compressor = Compressor(encoding, random_filename)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_iterator(response.streaming_content, compressor, padding)
+            else:
+                response.streaming_content = compress_iterator(response.streaming_content, compressor, padding)
+            del response.headers['Content-Length']
+        else:
+            compressed = compressor.compress_all(response.content + padding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class HybridSessionMiddleware(SessionMiddleware):
+    """
+    Сессии без базы для анонимных посетителей.
+
+    Посетители получают сессию ANONYMOUS_SESSION_ENGINE (подписанная cookie
+    или кэш) в cookie ANONYMOUS_SESSION_COOKIE_NAME, а в админке и для уже
+    вошедших сотрудников остаётся SESSION_ENGINE (база) в SESSION_COOKIE_NAME.
+    Хранилище выбирается по имени cookie, которую поставил этот middleware,
+    а не по виду её значения.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.AnonymousSessionStore = import_module(settings.ANONYMOUS_SESSION_ENGINE).SessionStore
+
+    def uses_primary_store(self, request):
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return True
+        return any(request.path_info.startswith(prefix) for prefix in settings.PRIMARY_SESSION_PATHS)
+
+    def process_request(self, request):
+        request.uses_primary_session = self.uses_primary_store(request)
+        if request.uses_primary_session:
+            request.session = self.SessionStore(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+        else:
+            request.session = self.AnonymousSessionStore(request.COOKIES.get(settings.ANONYMOUS_SESSION_COOKIE_NAME))
+
+    def process_response(self, request, response):
+        response = super().process_response(request, response)
+        if getattr(request, 'uses_primary_session', True):
+            return response
+        # SessionMiddleware ставит SESSION_COOKIE_NAME — переносим анонимную
+        # сессию в её cookie
+        morsel = response.cookies.pop(settings.SESSION_COOKIE_NAME, None)
+        name = settings.ANONYMOUS_SESSION_COOKIE_NAME
+        if request.session.is_empty():
+            if name in request.COOKIES:
+                response.delete_cookie(
+                    name,
+                    path=settings.SESSION_COOKIE_PATH,
+                    domain=settings.SESSION_COOKIE_DOMAIN,
+                    samesite=settings.SESSION_COOKIE_SAMESITE,
+                )
+                patch_vary_headers(response, ('Cookie',))
+        elif morsel is not None:
+            response.cookies[name] = morsel.value
+            response.cookies[name].update(morsel)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Решает, можно ли запросу читать с реплик (см. main/db_router.py).
+
+    Запросы на запись, админка и посетители с cookie REPLICA_STICKY_COOKIE
+    читают с основной базы. Если запрос что-то записал, cookie ставится на
+    REPLICA_STICKY_SECONDS — на время, за которое реплика догоняет основную базу.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with db_router.routing_state(self.reads_primary(request)) as state:
+            response = self.get_response(request)
+        return self.process_response(state, response)
+
+    async def __acall__(self, request):
+        with db_router.routing_state(self.reads_primary(request)) as state:
+            response = await self.get_response(request)
+        return self.process_response(state, response)
+
+    def reads_primary(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        if settings.REPLICA_STICKY_COOKIE in request.COOKIES:
+            return True
+        return any(request.path_info.startswith(prefix) for prefix in settings.REPLICA_PRIMARY_PATHS)
+
+    def process_response(self, state, response):
+        if state['wrote'] and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class PrerenderMiddleware:
+    """
+    Отдаёт пре-рендеренные страницы (main/prerender.py) без вызова представления.
+
+    Стоит последним в MIDDLEWARE: сессии, CSRF и сообщения уже обработаны,
+    а ответ проходит обратно через сжатие и остальные middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.prerendered_response(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.prerendered_response(request) or await self.get_response(request)
+
+    def prerendered_response(self, request):
+        if not prerender.can_serve(request):
+            return None
+        found = prerender.pages.get(request.path_info)
+        if found is None:
+            return None
+        return prerender.build_response(request, *found)
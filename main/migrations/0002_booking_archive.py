@@ -0,0 +1,52 @@
+# Generated by Django 4.2.23 on 2026-10-19 11:30
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('guest_name', models.CharField(max_length=100, verbose_name='Имя гостя')),
+                ('guest_phone', models.CharField(max_length=20, verbose_name='Телефон гостя')),
+                ('guest_email', models.EmailField(blank=True, max_length=254, verbose_name='Email гостя')),
+                ('check_in_date', models.DateField(verbose_name='Дата заезда')),
+                ('check_out_date', models.DateField(verbose_name='Дата выезда')),
+                ('guests_count', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)], verbose_name='Количество гостей')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Общая стоимость')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('confirmed', 'Подтверждено'), ('cancelled', 'Отменено'), ('completed', 'Завершено')], default='pending', max_length=20, verbose_name='Статус')),
+                ('special_requests', models.TextField(blank=True, verbose_name='Особые пожелания')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата обновления')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивное бронирование',
+                'verbose_name_plural': 'Архив бронирований',
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['house', 'check_in_date', 'check_out_date'], name='booking_availability_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'check_out_date'], name='booking_lifecycle_idx'),
+        ),
+        migrations.AddField(
+            model_name='bookingarchive',
+            name='house',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.house', verbose_name='Домик'),
+        ),
+    ]
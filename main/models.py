@@ -23,8 +23,8 @@ class House(models.Model):
         return f"{self.name} ({self.capacity} мест)"
 
 
-class Booking(models.Model):
-    """Модель бронирования"""
+class BookingBase(models.Model):
+    """Общие поля бронирования (рабочая таблица и архив)"""
     STATUS_CHOICES = [
         ('pending', 'Ожидает подтверждения'),
         ('confirmed', 'Подтверждено'),
@@ -49,13 +49,31 @@ class Booking(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
 
     class Meta:
-        verbose_name = "Бронирование"
-        verbose_name_plural = "Бронирования"
+        abstract = True
         ordering = ['-created_at']
 
     def __str__(self):
         return f"Бронирование {self.house.name} - {self.guest_name} ({self.check_in_date})"
 
+    @property
+    def nights(self):
+        """Количество ночей проживания"""
+        return (self.check_out_date - self.check_in_date).days
+
+
+class Booking(BookingBase):
+    """Модель бронирования"""
+    # Статусы, которые занимают даты домика
+    ACTIVE_STATUSES = ['pending', 'confirmed']
+
+    class Meta(BookingBase.Meta):
+        verbose_name = "Бронирование"
+        verbose_name_plural = "Бронирования"
+        indexes = [
+            models.Index(fields=['house', 'check_in_date', 'check_out_date'], name='booking_availability_idx'),
+            models.Index(fields=['status', 'check_out_date'], name='booking_lifecycle_idx'),
+        ]
+
     def clean(self):
         from django.core.exceptions import ValidationError
         if self.check_in_date and self.check_out_date:
@@ -65,6 +83,18 @@ class Booking(models.Model):
                 raise ValidationError("Дата выезда должна быть позже даты заезда")
 
 
+class BookingArchive(BookingBase):
+    """Архив завершённых и отменённых бронирований (вынесены из рабочей таблицы)"""
+    # Даты переносятся из рабочей таблицы как есть
+    created_at = models.DateTimeField(verbose_name="Дата создания")
+    updated_at = models.DateTimeField(verbose_name="Дата обновления")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата архивации")
+
+    class Meta(BookingBase.Meta):
+        verbose_name = "Архивное бронирование"
+        verbose_name_plural = "Архив бронирований"
+
+
 class Review(models.Model):
     """Модель отзыва"""
     guest_name = models.CharField(max_length=100, verbose_name="Имя гостя")
@@ -0,0 +1,166 @@
+"""
+Пре-рендеринг маркетинговых страниц в статический HTML.
+
+Страницы из ``PRERENDER_PAGES`` рендерятся через URLconf в файлы
+``<имя>.<хэш>.html`` в ``settings.PRERENDER_ROOT``; какой файл актуален,
+записано в manifest.json. ``PrerenderMiddleware`` отдаёт готовый файл
+анонимным GET-запросам, не доходя до URL-резолвера, представления и базы.
+При изменении моделей, от которых зависит страница, она перерисовывается
+(см. main/signals.py).
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse, HttpResponseNotModified
+from django.middleware.csrf import get_token
+from django.urls import resolve, reverse
+from django.utils.http import parse_etags
+
+from .db_router import on_primary
+
+# URL name -> модели, при изменении которых страница перерисовывается
+PRERENDER_PAGES = {
+    'main:home': ('House', 'Review', 'GalleryImage', 'Contact'),
+    # JSON-LD базы в base.html: фото домиков и рейтинг по отзывам
+    'main:about': ('House', 'Review', 'Contact'),
+    'main:contact': ('House', 'Review', 'Contact'),
+}
+
+CSRF_PLACEHOLDER = '__PRERENDER_CSRF_TOKEN__'
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def manifest_path():
+    return Path(settings.PRERENDER_ROOT) / 'manifest.json'
+
+
+def read_manifest():
+    try:
+        return json.loads(manifest_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(manifest):
+    path = manifest_path()
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def render_page(url_name):
+    """Рендерит страницу через URLconf и возвращает HTML с плейсхолдером CSRF"""
+    from django.test import RequestFactory
+
+    path = reverse(url_name)
+    request = RequestFactory().get(path)
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f'{path}: статус {response.status_code}')
+    html = response.content.decode(response.charset)
+    return CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', html)
+
+
+@on_primary
+def prerender(url_names=None):
+    """Перерисовывает страницы (все или перечисленные), возвращает manifest"""
+    root = Path(settings.PRERENDER_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest()
+    for url_name in url_names or PRERENDER_PAGES:
+        html = render_page(url_name)
+        digest = hashlib.md5(html.encode(), usedforsecurity=False).hexdigest()[:12]
+        filename = f"{url_name.split(':')[-1]}.{digest}.html"
+        (root / filename).write_text(html, encoding='utf-8')
+
+        previous = manifest.get(reverse(url_name), {}).get('file')
+        manifest[reverse(url_name)] = {
+            'file': filename,
+            'hash': digest,
+            'rendered_at': time.time(),
+            'csrf': CSRF_PLACEHOLDER in html,
+        }
+        write_manifest(manifest)
+        if previous and previous != filename:
+            (root / previous).unlink(missing_ok=True)
+    return manifest
+
+
+def pages_depending_on(model_name):
+    return [url_name for url_name, models in PRERENDER_PAGES.items() if model_name in models]
+
+
+class PrerenderedPages:
+    """Кэш manifest.json и файлов страниц в памяти процесса"""
+
+    def __init__(self):
+        self.manifest = {}
+        self.manifest_mtime = None
+        self.files = {}
+
+    def refresh(self):
+        # manifest.json может обновить другой воркер — сверяем mtime
+        try:
+            mtime = manifest_path().stat().st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self.manifest_mtime:
+            self.manifest = read_manifest() if mtime else {}
+            self.manifest_mtime = mtime
+            current = {entry['file'] for entry in self.manifest.values()}
+            self.files = {name: html for name, html in self.files.items() if name in current}
+
+    def get(self, path):
+        """(entry, html) свежей страницы или None"""
+        self.refresh()
+        entry = self.manifest.get(path)
+        if not entry or time.time() - entry['rendered_at'] > settings.PRERENDER_MAX_AGE:
+            return None
+        # Имена файлов содержат хэш, поэтому содержимое можно кэшировать
+        if entry['file'] not in self.files:
+            try:
+                path = Path(settings.PRERENDER_ROOT) / entry['file']
+                self.files[entry['file']] = path.read_text(encoding='utf-8')
+            except OSError:
+                return None
+        return entry, self.files[entry['file']]
+
+
+pages = PrerenderedPages()
+
+
+def can_serve(request):
+    if not settings.PRERENDER_ENABLED or request.method not in ('GET', 'HEAD') or request.GET:
+        return False
+    # Сессия в базе — это админка/сотрудники: им отдаём живую страницу
+    # (и не трогаем request.user, чтобы не ходить в базу из async-кода)
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    # Страница с flash-сообщением рендерится представлением
+    return not len(get_messages(request))
+
+
+def etag_matches(header, etag):
+    """
+    Слабое сравнение, как в django.utils.cache: CompressionMiddleware
+    отдаёт сжатую страницу с ETag W/"…", и браузер присылает его обратно.
+    """
+    tags = parse_etags(header)
+    return '*' in tags or etag in [tag.removeprefix('W/') for tag in tags]
+
+
+def build_response(request, entry, html):
+    if entry['csrf']:
+        # Токен у каждого посетителя свой, такие ответы не кэшируются по ETag
+        return HttpResponse(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+    etag = f'"{entry["hash"]}"'
+    if etag_matches(request.headers.get('If-None-Match', ''), etag):
+        return HttpResponseNotModified(headers={'ETag': etag})
+    return HttpResponse(html, headers={'ETag': etag})
@@ -0,0 +1,184 @@
+"""
+Ограничение частоты запросов и сброс нагрузки для JSON API.
+
+Счётчик с фиксированным окном на ключ (эндпоинт, клиент, окно) хранится в
+Django-кэше ``settings.RATELIMIT_CACHE``, общем для всех воркеров.
+Счётчик увеличивается атомарно (``add`` + ``incr``), поэтому параллельные
+запросы не проходят мимо лимита; атомарен ``incr`` у Redis и Memcached,
+кэш в памяти процесса не проходит check --deploy (см. main/checks.py).
+Клиент — API-ключ из заголовка, если он известен, иначе IP-адрес; за
+прокси — запись X-Forwarded-For, добавленная последним доверенным прокси
+(левые записи присылает сам клиент).
+
+``API_MAX_CONCURRENT`` — сколько запросов к API один ASGI-воркер
+обрабатывает одновременно; сверх этого он сразу отвечает 503, не вставая
+в очередь к базе. Это лимит процесса, а не общий на все воркеры. Под WSGI
+он не применяется: sync-воркер и так обрабатывает один запрос за раз.
+Счётчик в памяти процесса не «утекает», если воркер упал посреди запроса.
+"""
+import math
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60): число запросов и длина окна в секундах"""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period.strip().lower()[:1] or 's']
+
+
+class FixedWindow:
+    """Лимит запросов за окно фиксированной длины"""
+
+    def __init__(self, rate):
+        self.limit, self.period = parse_rate(rate)
+
+    def window(self, key, now):
+        """(ключ счётчика текущего окна, секунд до следующего окна)"""
+        index = int(now // self.period)
+        return f'{key}:{index}', (index + 1) * self.period - now
+
+
+class ConcurrencyLimiter:
+    """Счётчик одновременных запросов в пределах процесса"""
+
+    def __init__(self):
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, limit):
+        with self.lock:
+            if limit and self.active >= limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+
+concurrency = ConcurrencyLimiter()
+
+
+def concurrency_limit():
+    """Лимит одновременных запросов воркера, 0 — без ограничения"""
+    return settings.API_MAX_CONCURRENT if settings.SERVER_MODE == 'asgi' else 0
+
+
+def client_identity(request):
+    api_key = request.headers.get(settings.RATELIMIT_API_KEY_HEADER)
+    if api_key and api_key in settings.RATELIMIT_API_KEYS:
+        return f'key:{api_key}', settings.RATELIMIT_API_KEY_RATE
+    ip = request.META.get('REMOTE_ADDR', '')
+    if settings.RATELIMIT_TRUST_X_FORWARDED_FOR:
+        forwarded = [entry.strip() for entry in request.headers.get('X-Forwarded-For', '').split(',')]
+        forwarded = [entry for entry in forwarded if entry]
+        if forwarded:
+            # Каждый доверенный прокси дописывает адрес справа: клиент — запись
+            # RATELIMIT_TRUSTED_PROXIES-я с конца, всё левее может быть подделано
+            hops = max(1, settings.RATELIMIT_TRUSTED_PROXIES)
+            ip = forwarded[-hops] if len(forwarded) >= hops else forwarded[0]
+    return f'ip:{ip}', None
+
+
+def limiter_for(request, scope):
+    identity, rate = client_identity(request)
+    rate = rate or settings.RATELIMIT_RATES.get(scope)
+    if not rate:
+        return None, None
+    return f'ratelimit:{scope}:{identity}', FixedWindow(rate)
+
+
+def too_many_requests(retry_after):
+    response = JsonResponse({'error': 'Слишком много запросов, попробуйте позже'}, status=429)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def service_overloaded():
+    response = JsonResponse({'error': 'Сервис перегружен, попробуйте позже'}, status=503)
+    response['Retry-After'] = str(settings.API_SHED_RETRY_AFTER)
+    return response
+
+
+def count_request(key, timeout):
+    """Увеличивает счётчик окна и возвращает новое значение"""
+    cache = caches[settings.RATELIMIT_CACHE]
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен между add и incr — начинаем окно заново
+        cache.add(key, 1, timeout)
+        return 1
+
+
+# BaseCache.aincr в Django 4.2 — это aget + aset, без атомарности бэкенда,
+# поэтому async-путь вызывает синхронный incr в потоке
+acount_request = sync_to_async(count_request, thread_sensitive=False)
+
+
+def check_rate(request, scope):
+    key, limiter = limiter_for(request, scope)
+    if limiter is None:
+        return None
+    key, retry_after = limiter.window(key, time.time())
+    count = count_request(key, limiter.period)
+    return too_many_requests(retry_after) if count > limiter.limit else None
+
+
+async def acheck_rate(request, scope):
+    key, limiter = limiter_for(request, scope)
+    if limiter is None:
+        return None
+    key, retry_after = limiter.window(key, time.time())
+    count = await acount_request(key, limiter.period)
+    return too_many_requests(retry_after) if count > limiter.limit else None
+
+
+def rate_limit(scope):
+    """
+    Ограничивает частоту вызовов view по правилу ``RATELIMIT_RATES[scope]``
+    и под ASGI сбрасывает нагрузку при превышении ``API_MAX_CONCURRENT``.
+    """
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            async def wrapper(request, *args, **kwargs):
+                if not settings.RATELIMIT_ENABLED:
+                    return await view_func(request, *args, **kwargs)
+                rejected = await acheck_rate(request, scope)
+                if rejected is not None:
+                    return rejected
+                if not concurrency.acquire(concurrency_limit()):
+                    return service_overloaded()
+                try:
+                    return await view_func(request, *args, **kwargs)
+                finally:
+                    concurrency.release()
+        else:
+            def wrapper(request, *args, **kwargs):
+                if not settings.RATELIMIT_ENABLED:
+                    return view_func(request, *args, **kwargs)
+                rejected = check_rate(request, scope)
+                if rejected is not None:
+                    return rejected
+                if not concurrency.acquire(concurrency_limit()):
+                    return service_overloaded()
+                try:
+                    return view_func(request, *args, **kwargs)
+                finally:
+                    concurrency.release()
+
+        return wraps(view_func)(wrapper)
+
+    return decorator
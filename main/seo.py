@@ -0,0 +1,227 @@
+"""
+sitemap.xml и структурированные данные schema.org (JSON-LD).
+
+Всё строится из кэша: карта сайта, JSON-LD базы отдыха и каждого домика
+лежат в кэше под ключами с меткой времени последнего изменения каталога
+(``changed_at``). Сигналы моделей (main/signals.py) обновляют метку, и
+следующий запрос собирает данные заново; до этого краулеры получают
+готовый ответ без обращений к базе, а sitemap.xml — ещё и 304 по
+If-Modified-Since.
+"""
+import hashlib
+import json
+import time
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Avg, Count
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.safestring import mark_safe
+
+from .db_router import on_primary
+from .decorators import require_http_methods
+from .models import Contact, GalleryImage, House, Review
+
+CHANGED_AT_KEY = 'seo:changed_at'
+
+# Публичные страницы карты сайта помимо страниц домиков
+SITEMAP_PAGES = [
+    'main:home', 'main:houses_list', 'main:gallery', 'main:reviews',
+    'main:booking', 'main:about', 'main:contact',
+]
+
+# Значения по умолчанию, пока в админке не заведена контактная информация
+DEFAULT_TELEPHONE = '+7 (999) 123-45-67'
+DEFAULT_GEO = (51.821088, 85.802109)
+ADDRESS = {
+    '@type': 'PostalAddress',
+    'addressLocality': 'с. Озерное',
+    'addressRegion': 'Майминский район, Республика Алтай',
+    'addressCountry': 'RU',
+}
+AMENITIES = ['Wi-Fi', 'Рыбалка']
+STATIC_IMAGES = ['images/1.jpeg', 'images/2.jpeg']
+
+
+def changed_at():
+    """Время последнего изменения каталога (метка версии кэша)"""
+    return cache.get_or_set(CHANGED_AT_KEY, time.time, None)
+
+
+def mark_changed():
+    cache.set(CHANGED_AT_KEY, time.time(), None)
+
+
+def cached(name, build):
+    """Значение build() из кэша текущей версии"""
+    return cache.get_or_set(f'seo:{name}:{changed_at()}', on_primary(build), settings.SEO_CACHE_TIMEOUT)
+
+
+def absolute_url(url):
+    return urljoin(settings.SITE_URL.rstrip('/') + '/', url)
+
+
+def media_url(name):
+    return absolute_url(default_storage.url(name))
+
+
+def json_ld(data):
+    """<script type="application/ld+json"> с экранированием, как у json_script"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    payload = payload.replace('<', '\\u003C').replace('>', '\\u003E').replace('&', '\\u0026')
+    return format_html('<script type="application/ld+json">{}</script>', mark_safe(payload))
+
+
+def aggregate_rating():
+    """AggregateRating по одобренным отзывам или None, если отзывов нет"""
+    def build():
+        stats = Review.objects.filter(is_approved=True).aggregate(count=Count('id'), average=Avg('rating'))
+        if not stats['count']:
+            return None
+        return {
+            '@type': 'AggregateRating',
+            'ratingValue': round(stats['average'], 1),
+            'reviewCount': stats['count'],
+            'bestRating': 5,
+        }
+    # None не кэшируется get_or_set, поэтому храним обёртку
+    return cached('rating', lambda: [build()])[0]
+
+
+def contact_data():
+    def build():
+        contact = Contact.objects.first()
+        if contact is None:
+            return {'telephone': DEFAULT_TELEPHONE, 'address': ADDRESS, 'geo': DEFAULT_GEO}
+        return {
+            'telephone': contact.phone,
+            'address': {**ADDRESS, 'streetAddress': contact.address},
+            'geo': (float(contact.coordinates_lat), float(contact.coordinates_lng)),
+        }
+    return cached('contact', build)
+
+
+def resort_json_ld():
+    """Resort для всех страниц: контакты, фото домиков, рейтинг по отзывам"""
+    def build():
+        contact = contact_data()
+        images = [absolute_url(staticfiles_storage.url(path)) for path in STATIC_IMAGES]
+        images += [
+            media_url(name) for name in
+            House.objects.filter(is_available=True).exclude(image='').values_list('image', flat=True)
+        ]
+        data = {
+            '@context': 'https://schema.org',
+            '@type': 'Resort',
+            'name': 'AltaiResort',
+            'description': 'Уютная база отдыха в горах Алтая с камерной атмосферой',
+            'url': absolute_url('/'),
+            'telephone': contact['telephone'],
+            'address': contact['address'],
+            'geo': {'@type': 'GeoCoordinates', 'latitude': contact['geo'][0], 'longitude': contact['geo'][1]},
+            'openingHours': 'Mo-Su 00:00-23:59',
+            'priceRange': '₽₽',
+            'amenityFeature': [
+                {'@type': 'LocationFeatureSpecification', 'name': name, 'value': True} for name in AMENITIES
+            ],
+            'image': images,
+        }
+        rating = aggregate_rating()
+        if rating:
+            data['aggregateRating'] = rating
+        return json_ld(data)
+    return cached('resort', build)
+
+
+def house_json_ld(house):
+    """
+    LodgingBusiness с предложением (цена за ночь) для страницы домика.
+    Отзывы в модели не привязаны к домикам, поэтому рейтинг — общий по базе.
+    """
+    def build():
+        contact = contact_data()
+        url = absolute_url(reverse('main:house_detail', args=[house.id]))
+        price = str(house.price_per_night)
+        data = {
+            '@context': 'https://schema.org',
+            '@type': 'LodgingBusiness',
+            '@id': url,
+            'name': house.name,
+            'description': house.description,
+            'url': url,
+            'telephone': contact['telephone'],
+            'address': contact['address'],
+            'priceRange': f'от {price} ₽ за ночь',
+            'containedInPlace': {'@type': 'Resort', 'name': 'AltaiResort', 'url': absolute_url('/')},
+            'makesOffer': {
+                '@type': 'Offer',
+                'url': absolute_url(f"{reverse('main:booking')}?house={house.id}"),
+                'price': price,
+                'priceCurrency': 'RUB',
+                'availability': 'https://schema.org/InStock' if house.is_available else 'https://schema.org/SoldOut',
+                'priceSpecification': {
+                    '@type': 'UnitPriceSpecification',
+                    'price': price,
+                    'priceCurrency': 'RUB',
+                    'unitText': 'ночь',
+                },
+            },
+        }
+        if house.image:
+            data['image'] = media_url(house.image.name)
+        rating = aggregate_rating()
+        if rating:
+            data['aggregateRating'] = rating
+        return json_ld(data)
+    return cached(f'house:{house.id}', build)
+
+
+def sitemap_xml():
+    """Карта сайта с расширением image: фото домиков и галереи"""
+    def build():
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+            'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">',
+        ]
+
+        def url_entry(path, lastmod=None, images=()):
+            lines.append(f'<url><loc>{escape(absolute_url(path))}</loc>')
+            if lastmod:
+                lines.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+            for image in images:
+                lines.append(f'<image:image><image:loc>{escape(media_url(image))}</image:loc></image:image>')
+            lines.append('</url>')
+
+        gallery = [name for name in GalleryImage.objects.order_by('order', '-created_at')
+                   .values_list('image', flat=True) if name]
+        for url_name in SITEMAP_PAGES:
+            url_entry(reverse(url_name), images=gallery if url_name == 'main:gallery' else ())
+        houses = House.objects.filter(is_available=True).order_by('id').values_list('id', 'updated_at', 'image')
+        for house_id, updated_at, image in houses:
+            url_entry(reverse('main:house_detail', args=[house_id]), updated_at, [image] if image else [])
+        lines.append('</urlset>')
+        return '\n'.join(lines).encode()
+    return cached('sitemap', build)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def sitemap(request):
+    modified = int(changed_at())
+    headers = {
+        'Last-Modified': http_date(modified),
+        'Cache-Control': f'public, max-age={settings.SEO_CACHE_TIMEOUT}',
+    }
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if if_modified_since and modified <= if_modified_since:
+        return HttpResponseNotModified(headers=headers)
+    body = sitemap_xml()
+    headers['ETag'] = '"%s"' % hashlib.md5(body, usedforsecurity=False).hexdigest()
+    return HttpResponse(body, content_type='application/xml; charset=utf-8', headers=headers)
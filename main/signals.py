@@ -0,0 +1,57 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import prerender, seo
+from .api import bump_catalogue_version
+from .models import Contact, GalleryImage, House, Review
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_MODELS = {
+    House: 'houses',
+    Review: 'reviews',
+    GalleryImage: 'gallery',
+}
+
+
+def invalidate_catalogue(sender, **kwargs):
+    """Сбрасывает кэш JSON API каталога при изменении данных"""
+    bump_catalogue_version(CATALOGUE_MODELS[sender])
+
+
+for model in CATALOGUE_MODELS:
+    post_save.connect(invalidate_catalogue, sender=model, dispatch_uid=f'catalogue_{model.__name__}_save')
+    post_delete.connect(invalidate_catalogue, sender=model, dispatch_uid=f'catalogue_{model.__name__}_delete')
+
+
+def rerender_pages(sender, **kwargs):
+    """Перерисовывает пре-рендеренные страницы, зависящие от модели"""
+    url_names = prerender.pages_depending_on(sender.__name__)
+    if not settings.PRERENDER_ENABLED or not url_names:
+        return
+
+    def run():
+        try:
+            prerender.prerender(url_names)
+        except Exception:
+            logger.exception('Не удалось перерисовать страницы %s', url_names)
+
+    transaction.on_commit(run)
+
+
+for model in (House, Review, GalleryImage, Contact):
+    post_save.connect(rerender_pages, sender=model, dispatch_uid=f'prerender_{model.__name__}_save')
+    post_delete.connect(rerender_pages, sender=model, dispatch_uid=f'prerender_{model.__name__}_delete')
+
+
+def invalidate_seo(sender, **kwargs):
+    """Сбрасывает кэш sitemap.xml и JSON-LD"""
+    seo.mark_changed()
+
+
+for model in (House, Review, GalleryImage, Contact):
+    post_save.connect(invalidate_seo, sender=model, dispatch_uid=f'seo_{model.__name__}_save')
+    post_delete.connect(invalidate_seo, sender=model, dispatch_uid=f'seo_{model.__name__}_delete')
@@ -0,0 +1,126 @@
+"""
+Холодный старт: профиль загрузки, проверка миграций и прогрев.
+
+``profile_startup`` запускается в свежем процессе (см. команду
+startup_profile) и замеряет по каждому приложению импорт модуля,
+импорт моделей и ready(), затем создание WSGI-обработчика и время до
+первого байта ответа главной страницы. ``warm_up`` вызывается из
+gunicorn.conf.py в мастер-процессе при ``preload_app``: воркеры получают
+после fork уже загруженные модули, URLconf, шаблоны и готовую главную.
+
+Django импортируется внутри функций: модуль загружается до django.setup(),
+и его собственные импорты не должны попадать в замеры.
+"""
+import sys
+import time
+
+
+def elapsed_ms(started):
+    return (time.perf_counter() - started) * 1000
+
+
+def pending_migrations(database='default'):
+    """Неприменённые миграции; пустой список — migrate не нужен"""
+    from django.db import connections
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connections[database])
+    targets = executor.loader.graph.leaf_nodes()
+    return [migration for migration, backwards in executor.migration_plan(targets)]
+
+
+def profile_startup(path='/'):
+    """Замеры холодного старта в мс; вызывается до django.setup()"""
+    started = time.perf_counter()
+    import django
+    from django.apps import AppConfig
+    from django.conf import settings
+
+    settings.INSTALLED_APPS  # импорт модуля настроек
+    settings_ms = elapsed_ms(started)
+    apps = {}
+
+    def timed(label, phase, phase_started):
+        row = apps.setdefault(label, {'import': 0.0, 'models': 0.0, 'ready': 0.0})
+        row[phase] += elapsed_ms(phase_started)
+
+    original_create = AppConfig.create.__func__
+    original_import_models = AppConfig.import_models
+
+    def create(cls, entry):
+        phase_started = time.perf_counter()
+        app_config = original_create(cls, entry)
+        timed(app_config.label, 'import', phase_started)
+        return app_config
+
+    def import_models(self):
+        phase_started = time.perf_counter()
+        original_import_models(self)
+        timed(self.label, 'models', phase_started)
+        # Все import_models() выполняются до первого ready(), так что
+        # обёртка на экземпляре успевает подменить метод класса
+        original_ready = self.ready
+
+        def ready():
+            ready_started = time.perf_counter()
+            original_ready()
+            timed(self.label, 'ready', ready_started)
+        self.ready = ready
+
+    AppConfig.create = classmethod(create)
+    AppConfig.import_models = import_models
+    setup_started = time.perf_counter()
+    try:
+        django.setup(set_prefix=False)
+    finally:
+        AppConfig.create = classmethod(original_create)
+        AppConfig.import_models = original_import_models
+    setup_ms = elapsed_ms(setup_started)
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler_started = time.perf_counter()
+    handler = WSGIHandler()
+    handler_ms = elapsed_ms(handler_started)
+
+    request_started = time.perf_counter()
+    host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+    response = handler.get_response(RequestFactory().get(path, secure=True, HTTP_HOST=host))
+    return {
+        'apps': apps,
+        'settings': settings_ms,
+        'setup': setup_ms,
+        'handler': handler_ms,
+        'first_request': elapsed_ms(request_started),
+        'ttfb': elapsed_ms(started),
+        'status': response.status_code,
+        'pillow_loaded': 'PIL.Image' in sys.modules,
+    }
+
+
+def warm_up():
+    """
+    Прогрев перед fork воркеров: URLconf, шаблоны и пре-рендеренные
+    страницы (главная и др.) в памяти. Возвращает затраченное время в мс.
+    """
+    from django.conf import settings
+    from django.db import connections
+    from django.urls import get_resolver, reverse
+
+    from . import prerender
+
+    started = time.perf_counter()
+    get_resolver().url_patterns
+    if settings.PRERENDER_ENABLED:
+        # Перерисовываем только отсутствующие или устаревшие страницы
+        stale = [name for name in prerender.PRERENDER_PAGES if prerender.pages.get(reverse(name)) is None]
+        if stale:
+            prerender.prerender(stale)
+        for name in stale:
+            prerender.pages.get(reverse(name))
+    else:
+        prerender.render_page('main:home')
+    # Соединение SQLite не должно переживать fork: каждый воркер откроет своё
+    connections.close_all()
+    return elapsed_ms(started)
@@ -0,0 +1,61 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from main.assets import BUNDLES, bundle_path, critical_path
+
+register = template.Library()
+
+
+def bundle_url(name):
+    """URL собранного бандла или None, если бандлы выключены или не собраны"""
+    if not settings.ASSETS_USE_BUNDLES:
+        return None
+    try:
+        return staticfiles_storage.url(bundle_path(name))
+    except ValueError:
+        # Нет записи в манифесте — build_assets не запускался
+        return None
+
+
+@register.simple_tag
+def stylesheets(bundle='site.css', critical=None):
+    """
+    <link> на бандл стилей, а без бандла — на исходные файлы.
+
+    С critical='<страница>' и собранным critical CSS стили первого экрана
+    встраиваются в <style>, а полный бандл грузится без блокировки отрисовки.
+    """
+    url = bundle_url(bundle)
+    urls = [url] if url else [staticfiles_storage.url(path) for path in BUNDLES[bundle]]
+    critical_css = read_critical_css(critical) if critical and url else None
+    if critical_css:
+        links = format_html_join(
+            '\n',
+            '<link rel="preload" href="{0}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            '<noscript><link rel="stylesheet" href="{0}"></noscript>',
+            ((url,) for url in urls),
+        )
+        return format_html('<style>{}</style>\n{}', mark_safe(critical_css), links)
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+
+
+@register.simple_tag
+def scripts(bundle='site.js'):
+    url = bundle_url(bundle)
+    urls = [url] if url else [staticfiles_storage.url(path) for path in BUNDLES[bundle]]
+    return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in urls))
+
+
+@lru_cache(maxsize=None)
+def read_critical_css(page):
+    path = finders.find(critical_path(page))
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read()
@@ -0,0 +1,15 @@
+from django import template
+
+from main import seo
+
+register = template.Library()
+
+
+@register.simple_tag
+def resort_json_ld():
+    return seo.resort_json_ld()
+
+
+@register.simple_tag
+def house_json_ld(house):
+    return seo.house_json_ld(house)
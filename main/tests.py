@@ -1,3 +1,1103 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import OperationalError, connection, connections, transaction
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .availability import nearest_windows
+from .checks import check_shared_caches
+from .bulk_import import import_catalogue
+from .media import HashedMediaStorage
+from .db_router import ReplicaRouter, health, on_primary, routing_state, use_primary
+from .assets import bundle_path, minify_css, minify_js, parse_css_rules, select_rules
+from .middleware import (
+    ASYNC_STREAM_BATCH, AsyncStreamingMiddleware, CompressionMiddleware, HybridSessionMiddleware, brotli,
+)
+from . import api, lifecycle
+from .lifecycle import run_lifecycle
+from .models import Booking, BookingArchive, Contact, GalleryImage, House, Review
+from .prerender import pages, prerender, read_manifest
+from .ratelimit import concurrency
+from . import seo
+from .seo import SITEMAP_PAGES
+from .startup import pending_migrations, warm_up
+from .templatetags.assets import stylesheets
+
+# Страницы рендерятся без collectstatic, поэтому без манифеста хэшей
+plain_static = override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+
+
+class SQLiteConcurrencyTests(SimpleTestCase):
+    """Нагрузочная проверка профиля PRAGMA на файловой SQLite-базе"""
+    alias = 'sqlite_stress'
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        settings_dict = dict(connections['default'].settings_dict)
+        settings_dict['NAME'] = str(Path(self.tmpdir) / 'stress.sqlite3')
+        connections.settings[self.alias] = settings_dict
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER)')
+            cursor.execute('INSERT INTO counter (id, value) VALUES (1, 0)')
+
+    def tearDown(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+        del connections.settings[self.alias]
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def read_value(self):
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('SELECT value FROM counter WHERE id = 1')
+            return cursor.fetchone()[0]
+
+    def in_thread(self, target, *args):
+        def run():
+            try:
+                target(*args)
+            finally:
+                connections[self.alias].close()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_pragmas_applied(self):
+        status = connections[self.alias].get_pragma_status()
+        self.assertEqual(status['journal_mode'], 'wal')
+        self.assertEqual(status['busy_timeout'], 5000)
+        self.assertEqual(connections[self.alias].transaction_mode, 'IMMEDIATE')
+
+    def test_reads_do_not_block_on_open_write_transaction(self):
+        locked = threading.Event()
+        release = threading.Event()
+
+        def writer():
+            with transaction.atomic(using=self.alias):
+                with connections[self.alias].cursor() as cursor:
+                    cursor.execute('UPDATE counter SET value = 42 WHERE id = 1')
+                locked.set()
+                release.wait(10)
+
+        thread = self.in_thread(writer)
+        self.assertTrue(locked.wait(10))
+        started = time.monotonic()
+        # Читатель видит последнее зафиксированное состояние и не ждёт writer
+        self.assertEqual(self.read_value(), 0)
+        self.assertLess(time.monotonic() - started, 1)
+        release.set()
+        thread.join()
+        self.assertEqual(self.read_value(), 42)
+
+    def test_concurrent_read_modify_write_without_lock_errors(self):
+        writers, iterations = 4, 25
+        errors = []
+        stop_readers = threading.Event()
+
+        def increment():
+            try:
+                for _ in range(iterations):
+                    with transaction.atomic(using=self.alias):
+                        value = self.read_value()
+                        with connections[self.alias].cursor() as cursor:
+                            cursor.execute('UPDATE counter SET value = %s WHERE id = 1', [value + 1])
+            except OperationalError as e:
+                errors.append(e)
+
+        def read_loop():
+            try:
+                while not stop_readers.is_set():
+                    self.read_value()
+            except OperationalError as e:
+                errors.append(e)
+
+        readers = [self.in_thread(read_loop) for _ in range(2)]
+        threads = [self.in_thread(increment) for _ in range(writers)]
+        for thread in threads:
+            thread.join()
+        stop_readers.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.read_value(), writers * iterations)
+
+
+class AsyncAPITests(TestCase):
+    """JSON API работают как async-представления"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.house = House.objects.create(
+            name='Кедр', description='Домик', capacity=4,
+            price_per_night=5000, image='houses/kedr.jpg',
+        )
+        Booking.objects.create(
+            house=cls.house, guest_name='Иван', guest_phone='+79990000000',
+            check_in_date='2030-07-01', check_out_date='2030-07-05',
+            guests_count=2, total_price=20000, status='confirmed',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def post_json(self, path, data, **extra):
+        return await AsyncClient().post(path, data, content_type='application/json', **extra)
+
+    async def test_check_availability(self):
+        response = await self.post_json('/api/check-availability/', {
+            'house_id': self.house.id, 'check_in': '2030-07-03', 'check_out': '2030-07-08',
+        })
+        self.assertEqual(response.json()['available'], False)
+
+        response = await self.post_json('/api/check-availability/', {
+            'house_id': self.house.id, 'check_in': '2030-07-05', 'check_out': '2030-07-08',
+        })
+        self.assertEqual(response.json()['available'], True)
+
+    async def test_calculate_price(self):
+        response = await self.post_json('/api/calculate-price/', {
+            'house_id': self.house.id, 'check_in': '2030-07-01', 'check_out': '2030-07-04',
+        })
+        self.assertEqual(response.json(), {'nights': 3, 'price_per_night': 5000.0, 'total_price': 15000.0})
+
+        response = await self.post_json('/api/calculate-price/', {
+            'house_id': self.house.id + 1, 'check_in': '2030-07-01', 'check_out': '2030-07-04',
+        })
+        self.assertEqual(response.status_code, 404)
+
+    async def test_get_not_allowed(self):
+        response = await AsyncClient().get('/api/calculate-price/')
+        self.assertEqual(response.status_code, 405)
+
+    async def test_invalid_dates_are_bad_request(self):
+        response = await self.post_json('/api/calculate-price/', {
+            'house_id': self.house.id, 'check_in': 'завтра', 'check_out': '2030-07-04',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('завтра', response.json()['error'])
+
+
+class AlternativeDatesTests(TestCase):
+    """Поиск ближайших свободных окон"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kedr = House.objects.create(
+            name='Кедр', description='Домик', capacity=4,
+            price_per_night=5000, image='houses/kedr.jpg',
+        )
+        cls.pikhta = House.objects.create(
+            name='Пихта', description='Домик', capacity=6,
+            price_per_night=7000, image='houses/pikhta.jpg',
+        )
+        for check_in, check_out in [('2030-07-01', '2030-07-05'), ('2030-07-07', '2030-07-12')]:
+            Booking.objects.create(
+                house=cls.kedr, guest_name='Иван', guest_phone='+79990000000',
+                check_in_date=check_in, check_out_date=check_out,
+                guests_count=2, total_price=20000, status='confirmed',
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_nearest_windows_walks_overlapping_intervals(self):
+        d = datetime.date
+        booked = [(d(2030, 7, 1), d(2030, 7, 5)), (d(2030, 7, 3), d(2030, 7, 8)), (d(2030, 7, 10), d(2030, 7, 12))]
+        before, after = nearest_windows(booked, d(2030, 7, 6), 3, d(2030, 6, 1), d(2031, 6, 1))
+        # Окно 8–10 июля короче трёх ночей и пропускается
+        self.assertEqual(before, d(2030, 6, 28))
+        self.assertEqual(after, d(2030, 7, 12))
+
+    async def test_endpoint_suggests_windows_for_house_and_capacity(self):
+        payload = {'house_id': self.kedr.id, 'check_in': '2030-07-04', 'check_out': '2030-07-07'}
+        response = await AsyncClient().post('/api/alternative-dates/', payload, content_type='application/json')
+        [suggestion] = response.json()['suggestions']
+        self.assertEqual(suggestion['before'], {'check_in': '2030-06-28', 'check_out': '2030-07-01'})
+        self.assertEqual(suggestion['after'], {'check_in': '2030-07-12', 'check_out': '2030-07-15'})
+
+        payload = {'guests': 5, 'check_in': '2030-07-04', 'check_out': '2030-07-07'}
+        response = await AsyncClient().post('/api/alternative-dates/', payload, content_type='application/json')
+        [suggestion] = response.json()['suggestions']
+        self.assertEqual(suggestion['house_id'], self.pikhta.id)
+        self.assertEqual(suggestion['distance_days'], 0)
+
+    async def test_endpoint_rejects_empty_stay(self):
+        payload = {'house_id': self.kedr.id, 'check_in': '2030-07-04', 'check_out': '2030-07-04'}
+        response = await AsyncClient().post('/api/alternative-dates/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(RATELIMIT_RATES={'calculate_price': '2/m'}, RATELIMIT_API_KEYS=['partner'])
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.payload = {'house_id': 1, 'check_in': '2030-07-01', 'check_out': '2030-07-02'}
+
+    def post(self, **extra):
+        return self.client.post('/api/calculate-price/', self.payload, content_type='application/json', **extra)
+
+    def test_limit_exhausted_returns_429_with_retry_after(self):
+        # Середина минутного окна: до следующего 30 секунд
+        with mock.patch('main.ratelimit.time.time', return_value=1_800_000_030):
+            self.assertEqual(self.post().status_code, 404)
+            self.assertEqual(self.post().status_code, 404)
+            response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+        with mock.patch('main.ratelimit.time.time', return_value=1_800_000_060):
+            self.assertEqual(self.post().status_code, 404)
+
+    async def test_concurrent_requests_do_not_exceed_limit(self):
+        async def post():
+            response = await AsyncClient().post(
+                '/api/calculate-price/', self.payload, content_type='application/json',
+            )
+            return response.status_code
+
+        with mock.patch('main.ratelimit.time.time', return_value=1_800_000_000):
+            statuses = await asyncio.gather(*(post() for _ in range(16)))
+        self.assertEqual(sorted(statuses), [404] * 2 + [429] * 14)
+
+    def test_buckets_are_per_client(self):
+        for _ in range(3):
+            self.post()
+        self.assertEqual(self.post(REMOTE_ADDR='10.0.0.2').status_code, 404)
+        self.assertEqual(self.post(HTTP_X_API_KEY='partner').status_code, 404)
+
+    @override_settings(RATELIMIT_TRUST_X_FORWARDED_FOR=True, RATELIMIT_TRUSTED_PROXIES=1)
+    def test_spoofed_forwarded_prefix_does_not_reset_bucket(self):
+        # Клиент подставляет случайный адрес слева, прокси дописывает настоящий справа
+        statuses = [
+            self.post(HTTP_X_FORWARDED_FOR=f'198.51.100.{index}, 203.0.113.7').status_code for index in range(3)
+        ]
+        self.assertEqual(statuses, [404, 404, 429])
+        self.assertEqual(self.post(HTTP_X_FORWARDED_FOR='203.0.113.8').status_code, 404)
+
+    def test_deploy_check_requires_shared_cache(self):
+        def check_ids(backend):
+            with override_settings(CACHES={'default': {'BACKEND': f'django.core.cache.backends.{backend}'}}):
+                return [error.id for error in check_shared_caches(None)]
+
+        self.assertEqual(check_ids('locmem.LocMemCache'), ['main.E001', 'main.E002'])
+        # Лимиты в DatabaseCache писали бы в базу бронирований на каждый запрос
+        self.assertEqual(check_ids('db.DatabaseCache'), ['main.E003'])
+        self.assertEqual(check_ids('filebased.FileBasedCache'), ['main.W001'])
+        self.assertEqual(check_ids('redis.RedisCache'), [])
+
+    @override_settings(API_MAX_CONCURRENT=1, SERVER_MODE='asgi')
+    def test_load_shedding_returns_503(self):
+        self.assertTrue(concurrency.acquire(1))
+        try:
+            response = self.post()
+            with override_settings(SERVER_MODE='wsgi'):
+                # Sync-воркер и так обрабатывает один запрос за раз
+                self.assertEqual(self.post(REMOTE_ADDR='10.0.0.3').status_code, 404)
+        finally:
+            concurrency.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+class CatalogueAPITests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for index, price in enumerate([3000, 5000, 5000, 8000, 12000]):
+            House.objects.create(
+                name=f'Домик {index}', description='Очень длинное описание ' * 50,
+                capacity=2 + index, price_per_night=price, image=f'houses/{index}.jpg',
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sparse_fields(self):
+        response = self.client.get('/api/houses/', {'fields': 'id,name'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name'})
+
+        response = self.client.get('/api/houses/', {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/houses/', {'fields': ','})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name', 'capacity', 'price_per_night', 'image'})
+
+    def test_filters_match_houses_list(self):
+        response = self.client.get('/api/houses/', {'min_price': 5000, 'capacity': 4, 'fields': 'name'})
+        self.assertEqual([item['name'] for item in response.json()['results']],
+                         ['Домик 2', 'Домик 3', 'Домик 4'])
+
+    def test_cursor_pagination_walks_all_rows(self):
+        seen, params = [], {'sort': 'price_high', 'limit': 2, 'fields': 'id,price_per_night'}
+        while True:
+            data = self.client.get('/api/houses/', params).json()
+            seen += [item['price_per_night'] for item in data['results']]
+            if not data['next']:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(seen, [12000.0, 8000.0, 5000.0, 5000.0, 3000.0])
+
+    def test_malformed_cursor_returns_400(self):
+        cases = [
+            ('name', 'не base64'),
+            ('name', api.encode_cursor({'id': 1})),
+            ('name', api.encode_cursor([{}, {}])),
+            ('price_high', api.encode_cursor([{}, {}])),
+            ('name', api.encode_cursor([[1], 2])),
+            ('price_high', api.encode_cursor(['abc', 1])),
+        ]
+        for sort, cursor in cases:
+            with self.subTest(sort=sort, cursor=cursor):
+                response = self.client.get('/api/houses/', {'sort': sort, 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_cached_payload_invalidated_on_save(self):
+        self.client.get('/api/houses/', {'fields': 'name'})
+        with self.assertNumQueries(0):
+            self.client.get('/api/houses/', {'fields': 'name'})
+        House.objects.filter(name='Домик 0').first().delete()
+        response = self.client.get('/api/houses/', {'fields': 'name'})
+        self.assertEqual(len(response.json()['results']), 4)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Чтение с реплик по кругу, запись и админка — в основную базу"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        health.mark_up('replica_1')
+        health.mark_up('replica_2')
+        self.addCleanup(health.reset)
+
+    def test_round_robin_and_failover(self):
+        reads = [self.router.db_for_read(House) for _ in range(4)]
+        self.assertEqual(reads, ['replica_1', 'replica_2', 'replica_1', 'replica_2'])
+
+        health.mark_down('replica_1')
+        self.assertEqual({self.router.db_for_read(House) for _ in range(4)}, {'replica_2'})
+        health.mark_down('replica_2')
+        self.assertEqual(self.router.db_for_read(House), 'default')
+
+    def test_pinned_reads_and_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(House), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(House), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'main'))
+
+    def test_cache_rebuilds_read_from_primary(self):
+        cache.clear()
+        self.assertEqual(seo.cached('probe', lambda: self.router.db_for_read(House)), 'default')
+        self.assertEqual(on_primary(self.router.db_for_read)(House), 'default')
+        # Вне пересборки чтение по-прежнему идёт на реплику
+        self.assertIn(self.router.db_for_read(House), settings.DATABASE_REPLICAS)
+
+    def test_only_replica_routed_writes_make_reads_sticky(self):
+        with routing_state() as state:
+            self.router.db_for_write(Session)
+            self.assertFalse(state['wrote'])
+            self.assertEqual(self.router.db_for_read(House), 'replica_1')
+            self.router.db_for_write(Booking)
+            self.assertTrue(state['wrote'])
+            self.assertEqual(self.router.db_for_read(House), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_missing'])
+class ReadYourWritesTests(TestCase):
+    """После бронирования посетитель читает с основной базы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.house = House.objects.create(
+            name='Кедр', description='Домик', capacity=4,
+            price_per_night=5000, image='houses/kedr.jpg',
+        )
+
+    def tearDown(self):
+        health.reset()
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(House), 'default')
+
+    @plain_static
+    def test_booking_sets_sticky_cookie(self):
+        response = self.client.get('/houses/')
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+        response = self.client.post('/booking/', {
+            'house': self.house.id, 'guest_name': 'Иван', 'guest_phone': '+79990000000',
+            'check_in_date': '2030-07-01', 'check_out_date': '2030-07-03', 'guests_count': 2,
+        })
+        self.assertEqual(response.status_code, 302)
+        cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_STICKY_SECONDS)
+
+
+@plain_static
+class JinjaTemplatesTests(TestCase):
+    """Публичные страницы на Jinja2 совпадают с Django-шаблонами"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.house = House.objects.create(
+            name='Кедр', description='Домик', capacity=4,
+            price_per_night=5000, image='houses/kedr.jpg',
+        )
+        cls.booking = Booking.objects.create(
+            house=cls.house, guest_name='Иван', guest_phone='+79990000000',
+            check_in_date='2030-07-01', check_out_date='2030-07-04',
+            guests_count=2, total_price=15000,
+        )
+        Review.objects.create(guest_name='Анна', rating=5, text='Отлично', is_approved=True)
+        GalleryImage.objects.create(title='Рассвет', image='gallery/dawn.jpg', alt_text='Рассвет', is_featured=True)
+        Contact.objects.create(
+            phone='+7 (999) 000-00-00', email='info@example.com', address='Алтай',
+            coordinates_lat=51.8, coordinates_lng=85.8, working_hours='круглосуточно',
+        )
+
+    def get(self, path, engine):
+        templates = {
+            'django': [settings.DJANGO_TEMPLATES],
+            'jinja2': [settings.JINJA2_TEMPLATES, settings.DJANGO_TEMPLATES],
+        }[engine]
+        with override_settings(TEMPLATES=templates):
+            return self.client.get(path)
+
+    def strip_csrf(self, html):
+        return re.sub(r'(csrfmiddlewaretoken" value=")[^"]*', r'\1', html.decode()).strip()
+
+    def test_pages_render_the_same(self):
+        paths = [reverse(name) for name in SITEMAP_PAGES] + [
+            reverse('main:house_detail', args=[self.house.id]),
+            reverse('main:booking_success', args=[self.booking.id]),
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                expected = self.get(path, 'django')
+                response = self.get(path, 'jinja2')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.strip_csrf(response.content), self.strip_csrf(expected.content))
+
+    def test_booking_success_shows_nights(self):
+        for engine in ['django', 'jinja2']:
+            with self.subTest(engine=engine):
+                response = self.get(reverse('main:booking_success', args=[self.booking.id]), engine)
+                self.assertRegex(response.content.decode(), r'Количество ночей:</strong>\s*3\s*</p>')
+
+    def test_admin_stays_on_django_templates(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.login(username='admin', password='secret')
+        response = self.get('/admin/', 'jinja2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.templates[0].name, 'admin/index.html')
+
+
+@plain_static
+class SeoTests(TestCase):
+    """sitemap.xml и JSON-LD из кэша"""
+
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(
+            name='Кедр', description='У реки', capacity=4, price_per_night=5000, image='houses/kedr.jpg',
+        )
+        GalleryImage.objects.create(title='Рассвет', image='gallery/dawn.jpg', alt_text='Рассвет')
+        Review.objects.create(guest_name='Анна', rating=5, text='Отлично', is_approved=True)
+        Review.objects.create(guest_name='Иван', rating=4, text='Хорошо', is_approved=True)
+
+    def test_sitemap_is_cached_and_invalidated_by_signals(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response['Content-Type'], 'application/xml; charset=utf-8')
+        self.assertContains(response, f'<loc>https://altai-tishina.ru/houses/{self.house.id}/</loc>')
+        self.assertContains(response, '<image:loc>https://altai-tishina.ru/media/houses/kedr.jpg</image:loc>')
+        self.assertContains(response, '<image:loc>https://altai-tishina.ru/media/gallery/dawn.jpg</image:loc>')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/sitemap.xml').content, response.content)
+            not_modified = self.client.get('/sitemap.xml', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with mock.patch('main.seo.time.time', return_value=time.time() + 5):
+            House.objects.create(name='Пихта', description='У леса', capacity=2, price_per_night=3000, image='')
+        response = self.client.get('/sitemap.xml', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        # Список домиков и страницы двух домиков
+        self.assertEqual(response.content.count(b'<loc>https://altai-tishina.ru/houses/'), 3)
+
+    def test_house_page_has_lodging_json_ld(self):
+        response = self.client.get(f'/houses/{self.house.id}/')
+        data = [
+            json.loads(block) for block in
+            re.findall(r'<script type="application/ld\+json">(.*?)</script>', response.content.decode())
+        ]
+        self.assertEqual([item['@type'] for item in data], ['Resort', 'LodgingBusiness'])
+        lodging = data[1]
+        self.assertEqual(lodging['makesOffer']['price'], '5000.00')
+        self.assertEqual(lodging['makesOffer']['priceCurrency'], 'RUB')
+        self.assertEqual(lodging['aggregateRating']['ratingValue'], 4.5)
+        self.assertEqual(lodging['aggregateRating']['reviewCount'], 2)
+        self.assertEqual(data[0]['image'][-1], 'https://altai-tishina.ru/media/houses/kedr.jpg')
+        # Повторный рендер: JSON-LD из кэша, запросы только самого представления (домик и контакты)
+        with self.assertNumQueries(2):
+            self.client.get(f'/houses/{self.house.id}/')
+
+
+@plain_static
+class BookingFormTests(TestCase):
+    """Форма бронирования на кэшированном списке домиков"""
+
+    def setUp(self):
+        cache.clear()
+        self.house = House.objects.create(
+            name='Кедр', description='У реки', capacity=4, price_per_night=5000, image='houses/kedr.jpg',
+        )
+        self.check_in = timezone.now().date() + datetime.timedelta(days=10)
+        self.data = {
+            'house': self.house.id, 'guest_name': 'Анна', 'guest_phone': '+7 (999) 123-45-67',
+            'check_in_date': self.check_in, 'check_out_date': self.check_in + datetime.timedelta(days=3),
+            'guests_count': 2,
+        }
+
+    def test_page_view_and_submit_use_fixed_queries(self):
+        self.client.get('/booking/')  # заполняет кэш домиков
+        # Страница: только контакты; отправка: цена из базы и INSERT в транзакции
+        with self.assertNumQueries(1):
+            response = self.client.get('/booking/')
+        choices = json.loads(re.search(
+            r'<script id="house-choices" type="application/json">(.*?)</script>', response.content.decode(),
+        ).group(1))
+        self.assertEqual(choices, [{'id': self.house.id, 'name': 'Кедр', 'capacity': 4, 'price_per_night': '5000.00'}])
+
+        # SAVEPOINT, SELECT домика, INSERT, RELEASE
+        with self.assertNumQueries(4):
+            response = self.client.post('/booking/', self.data)
+        booking = Booking.objects.get()
+        self.assertRedirects(response, f'/booking/success/{booking.id}/')
+        self.assertEqual(booking.total_price, 15000)
+
+    def test_validation_uses_cached_capacity(self):
+        self.client.get('/booking/')
+        # Только контакты для повторного показа формы
+        with self.assertNumQueries(1):
+            response = self.client.post('/booking/', {**self.data, 'guests_count': 6})
+        self.assertContains(response, 'вмещает максимум 4 человек')
+        self.assertFalse(Booking.objects.exists())
+
+    def test_save_uses_price_and_availability_from_database(self):
+        self.client.get('/booking/')
+        # update() не шлёт сигналов — кэш остаётся со старой ценой
+        House.objects.filter(pk=self.house.pk).update(price_per_night=6000, description='Обновлено')
+        self.client.post('/booking/', self.data)
+        booking = Booking.objects.get()
+        self.assertEqual(booking.total_price, 18000)
+        self.house.refresh_from_db()
+        self.assertEqual(self.house.description, 'Обновлено')
+
+        House.objects.filter(pk=self.house.pk).update(is_available=False)
+        response = self.client.post('/booking/', self.data)
+        self.assertContains(response, 'больше недоступен')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_house_change_refreshes_choices(self):
+        self.client.get('/booking/')
+        self.house.is_available = False
+        self.house.save()
+        response = self.client.post('/booking/', self.data)
+        self.assertContains(response, 'Выберите корректный вариант')
+        self.assertNotContains(response, 'Кедр')
+
+
+class BulkImportTests(TestCase):
+    """Импорт каталога из манифеста и ZIP-архива"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_archive(self, files):
+        from PIL import Image
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, color in files.items():
+                if color is None:
+                    archive.writestr(name, b'not an image')
+                    continue
+                image = BytesIO()
+                Image.new('RGB', (4, 4), color).save(image, 'PNG')
+                archive.writestr(name, image.getvalue())
+        buffer.seek(0)
+        return buffer
+
+    def test_valid_rows_are_imported_and_bad_rows_reported(self):
+        manifest = BytesIO(
+            'name,description,capacity,price_per_night,image\n'
+            'Кедр,У реки,4,5000,kedr.png\n'
+            'Пихта,У леса,много,4000,kedr.png\n'
+            'Лиственница,На холме,2,3000,missing.png\n'
+            'Ель,В долине,3,3500,broken.png\n'
+            'Сосна,У озера,6,7000,photos/kedr.png\n'.encode()
+        )
+        archive = self.make_archive({'kedr.png': 'green', 'photos/kedr.png': 'green', 'broken.png': None})
+
+        # Одна пачка: SAVEPOINT, INSERT всех строк, RELEASE
+        with self.assertNumQueries(3):
+            result = import_catalogue('houses', manifest, 'houses.csv', archive)
+
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([number for number, message in result['errors']], [2, 3, 4])
+        self.assertIn('capacity', result['errors'][0][1])
+        self.assertIn('missing.png', result['errors'][1][1])
+        self.assertIn('не является изображением', result['errors'][2][1])
+        houses = House.objects.order_by('name')
+        self.assertTrue(all(house.is_available for house in houses))
+        # Одинаковые картинки под разными именами — один файл в хранилище
+        self.assertEqual(len({house.image.name for house in houses}), 1)
+        self.assertEqual(len(os.listdir(Path(self.media_root) / 'houses')), 1)
+
+    def test_failed_batch_does_not_leave_orphan_images(self):
+        manifest = BytesIO(
+            'name,description,capacity,price_per_night,image\n'
+            'Кедр,У реки,4,5000,kedr.png\n'
+            'Пихта,У леса,2,4000,pihta.png\n'
+            'Сосна,У озера,6,7000,sosna.png\n'.encode()
+        )
+        archive = self.make_archive({'kedr.png': 'green', 'pihta.png': 'blue', 'sosna.png': 'green'})
+        bulk_create = House.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(objs, *args, **kwargs):
+            calls.append(objs)
+            if len(calls) > 1:
+                raise OperationalError('database is locked')
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(House.objects, 'bulk_create', failing_bulk_create):
+            result = import_catalogue('houses', manifest, 'houses.csv', archive, batch_size=1)
+
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([number for number, _ in result['errors']], [2, 3])
+        # Файл «Пихты» удалён, общий файл «Кедра» и «Сосны» остался у «Кедра»
+        kedr = House.objects.get()
+        self.assertEqual(os.listdir(Path(self.media_root) / 'houses'), [Path(kedr.image.name).name])
+
+    @plain_static
+    def test_admin_upload(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.assertContains(self.client.get(reverse('admin:main_galleryimage_changelist')), 'Импорт из файла')
+        self.assertContains(self.client.get(reverse('admin:main_galleryimage_import')), 'alt_text')
+        manifest = ContentFile(json.dumps([
+            {'title': 'Рассвет', 'alt_text': 'Горы на рассвете', 'is_featured': True, 'image': 'dawn.png'},
+            {'title': 'Закат', 'alt_text': 'Горы на закате', 'order': 2, 'image': 'dusk.png'},
+        ]).encode(), name='gallery.json')
+        archive = ContentFile(self.make_archive({'dawn.png': 'orange', 'dusk.png': 'purple'}).getvalue(),
+                              name='images.zip')
+
+        response = self.client.post(reverse('admin:main_galleryimage_import'),
+                                    {'manifest': manifest, 'images': archive})
+
+        self.assertRedirects(response, reverse('admin:main_galleryimage_changelist'))
+        self.assertEqual(
+            list(GalleryImage.objects.values_list('title', 'is_featured', 'order')),
+            [('Рассвет', True, 0), ('Закат', False, 2)],
+        )
+
+    def test_command_reports_errors_without_images(self):
+        manifest = Path(self.media_root) / 'reviews.csv'
+        manifest.write_text('guest_name,rating,text,is_approved\nАнна,5,Отлично,true\nИван,9,Плохо,false\n')
+        out = StringIO()
+        call_command('import_catalogue', 'reviews', str(manifest), stdout=out)
+        self.assertIn('Запись 2: rating', out.getvalue())
+        self.assertIn('Импортировано: 1, с ошибками: 1', out.getvalue())
+
+
+class MediaTests(SimpleTestCase):
+    """Хэшированные имена загрузок и отдача медиа"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.storage = HashedMediaStorage(location=self.media_root)
+        self.body = bytes(range(256)) * 8
+        self.name = self.storage.save('gallery/Фото.JPG', ContentFile(self.body))
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_identical_uploads_share_one_file(self):
+        self.assertRegex(self.name, r'^gallery/[0-9a-f]{16}\.jpg$')
+        self.assertEqual(self.storage.save('gallery/copy.jpg', ContentFile(self.body)), self.name)
+        self.assertEqual(os.listdir(Path(self.media_root) / 'gallery'), [Path(self.name).name])
+
+    def test_hashed_file_is_immutable_and_supports_ranges(self):
+        response = self.client.get(f'/media/{self.name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+
+        response = self.client.get(f'/media/{self.name}', HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[100:200])
+
+        response = self.client.get(f'/media/{self.name}', HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.body[-10:])
+
+        response = self.client.get(f'/media/{self.name}', HTTP_RANGE=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+
+        response = self.client.get(f'/media/{self.name}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    async def test_ranges_stream_asynchronously_under_asgi(self):
+        response = await AsyncClient().get(f'/media/{self.name}', headers={'Range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response]), self.body[100:200])
+
+    def test_paths_outside_media_root_are_not_served(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/gallery/').status_code, 404)
+
+
+class AssetPipelineTests(SimpleTestCase):
+
+    def test_minify_css_keeps_strings_and_descendant_pseudo(self):
+        css = "/* c */ .a :hover ,  .b > p { content: ' a  b ';  color : red ; }"
+        self.assertEqual(minify_css(css), ".a :hover,.b>p{content:' a  b ';color:red}")
+
+    def test_minify_js_drops_trailing_comments_outside_strings(self):
+        js = "var a = 1;  // счётчик\nvar url = 'http://x'; /* блок */\nvar re = /\\/\\//g;\n"
+        self.assertEqual(minify_js(js), "var a=1;var url='http://x';var re=/\\/\\//g;\n")
+
+    @plain_static
+    @override_settings(ASSETS_USE_BUNDLES=False)
+    def test_page_styles_are_bundles(self):
+        self.assertEqual(
+            str(stylesheets('pages/about.css')),
+            f'<link rel="stylesheet" href="{settings.STATIC_URL}css/pages/about.css">',
+        )
+        self.assertEqual(bundle_path('pages/about.css'), 'build/pages/about.min.css')
+        for name in ['about', 'booking_success', 'contact', 'houses_list']:
+            for directory in ['templates', 'jinja2']:
+                source = (Path(settings.BASE_DIR) / directory / 'main' / f'{name}.html').read_text(encoding='utf-8')
+                self.assertNotIn('css/pages/', source)
+
+    def test_critical_rules_follow_used_selectors_and_animations(self):
+        css = """
+            .hero { animation: bounce 2s; }
+            .footer { color: red; }
+            @media (max-width: 768px) { .hero { height: 50vh; } .footer { display: none; } }
+            @keyframes bounce { from { top: 0; } to { top: 1px; } }
+            @keyframes unused { from { top: 0; } }
+        """
+        selected = minify_css(select_rules(parse_css_rules(css), {'.hero'}))
+        self.assertEqual(
+            selected,
+            '.hero{animation:bounce 2s}@media (max-width:768px){.hero{height:50vh}}'
+            '@keyframes bounce{from{top:0}to{top:1px}}',
+        )
+
+
+class AsyncStreamingMiddlewareTests(SimpleTestCase):
+
+    async def test_sync_stream_is_sent_in_batches_under_asgi(self):
+        consumed = []
+
+        def chunks():
+            for index in range(10):
+                consumed.append(index)
+                yield b'x' * ASYNC_STREAM_BATCH
+
+        async def get_response(request):
+            return StreamingHttpResponse(chunks())
+
+        response = await AsyncStreamingMiddleware(get_response)(RequestFactory().get('/'))
+        self.assertTrue(response.is_async)
+        stream = aiter(response)
+        self.assertEqual(len(await anext(stream)), ASYNC_STREAM_BATCH)
+        # Прочитана одна порция, а не всё тело, как делал бы ASGIHandler
+        self.assertEqual(consumed, [0])
+        rest = [chunk async for chunk in stream]
+        self.assertEqual(len(rest), 9)
+
+    def test_wsgi_response_is_untouched(self):
+        response = StreamingHttpResponse(iter([b'a', b'b']))
+        self.assertIs(AsyncStreamingMiddleware(lambda request: response)(RequestFactory().get('/')), response)
+        self.assertFalse(response.is_async)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = ('<p>Уютные дома в горах Алтая</p>' * 100).encode()
+
+    def process(self, response, accept='gzip, deflate, br', csrf=False):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        if csrf:
+            request.META['CSRF_COOKIE_USED'] = True
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_gzip_when_brotli_not_accepted(self):
+        response = self.process(HttpResponse(self.body), accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_brotli_preferred(self):
+        if brotli is None:
+            self.skipTest('Brotli не установлен')
+        response = self.process(HttpResponse(self.body))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.body)
+
+    def test_streaming_is_compressed_incrementally(self):
+        chunks = [self.body[:1000], self.body[1000:]]
+        response = self.process(StreamingHttpResponse(iter(chunks)), accept='gzip')
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 2)
+        self.assertTrue(all(parts[:2]))
+        self.assertEqual(gzip.decompress(b''.join(parts)), self.body)
+
+    def test_skips_small_incompressible_and_already_encoded(self):
+        self.assertFalse(self.process(HttpResponse(b'ok')).has_header('Content-Encoding'))
+        response = HttpResponse(self.body, content_type='image/png')
+        self.assertFalse(self.process(response).has_header('Content-Encoding'))
+
+        body = gzip.compress(self.body)
+        response = self.process(HttpResponse(body, headers={'Content-Encoding': 'gzip'}))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, body)
+
+    def test_csrf_pages_are_padded(self):
+        sizes = {
+            len(gzip.decompress(self.process(HttpResponse(self.body), accept='gzip', csrf=True).content))
+            for _ in range(10)
+        }
+        self.assertGreater(len(sizes), 1)
+        self.assertTrue(all(size > len(self.body) for size in sizes))
+
+    @override_settings(COMPRESSION_BREACH_PADDING=0)
+    def test_csrf_pages_uncompressed_without_padding(self):
+        response = self.process(HttpResponse(self.body), csrf=True)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@plain_static
+class AnonymousSessionTests(TestCase):
+    """В режиме hybrid анонимный трафик не трогает таблицу django_session"""
+
+    def session_queries(self, context):
+        return [query['sql'] for query in context.captured_queries if 'django_session' in query['sql']]
+
+    def test_anonymous_pages_and_flash_messages_skip_session_table(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/')
+            response = self.client.post('/contact/', {
+                'name': 'Анна', 'email': 'anna@example.com',
+                'phone': '+7 (999) 123-45-67', 'message': 'Здравствуйте',
+            }, follow=True)
+        self.assertContains(response, 'Ваше сообщение отправлено')
+        self.assertEqual(self.session_queries(context), [])
+        self.assertEqual(Session.objects.count(), 0)
+
+    def test_admin_keeps_database_sessions(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.post('/admin/login/', {'username': 'admin', 'password': 'pass'})
+        self.assertEqual(Session.objects.count(), 1)
+        self.assertEqual(self.client.cookies[settings.SESSION_COOKIE_NAME].value, Session.objects.get().session_key)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.session_queries(context), [])
+
+    @override_settings(ANONYMOUS_SESSION_ENGINE='django.contrib.sessions.backends.cache')
+    def test_store_is_chosen_by_cookie_name_not_key_shape(self):
+        # Ключ сессии в кэше — те же 32 символа [a-z0-9], что и ключ в базе
+        middleware = HybridSessionMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.ANONYMOUS_SESSION_COOKIE_NAME] = 'a' * 32
+        middleware.process_request(request)
+        self.assertIsInstance(request.session, middleware.AnonymousSessionStore)
+        request.session['seen'] = True
+        response = middleware.process_response(request, HttpResponse())
+        self.assertIn(settings.ANONYMOUS_SESSION_COOKIE_NAME, response.cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(Session.objects.count(), 0)
+
+    def test_prune_sessions_in_batches(self):
+        expired = timezone.now() - timezone.timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f'{index:032d}', session_data='', expire_date=expired)
+            for index in range(7)
+        )
+        Session.objects.create(session_key='f' * 32, session_data='',
+                               expire_date=timezone.now() + timezone.timedelta(days=1))
+        call_command('prune_sessions', batch_size=3, sleep=0, stdout=StringIO())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['f' * 32])
+
+
+@plain_static
+class PrerenderTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        override = override_settings(PRERENDER_ENABLED=True, PRERENDER_ROOT=self.tmpdir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.contact = Contact.objects.create(
+            phone='+7 (999) 000-00-00', email='info@example.com', address='Алтай',
+            coordinates_lat=51.8, coordinates_lng=85.8, working_hours='круглосуточно',
+        )
+        prerender()
+
+    def test_prerendered_page_skips_view_and_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/about/')
+        self.assertContains(response, '+7 (999) 000-00-00')
+        self.assertEqual(self.client.get('/about/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_only_database_session_gets_live_page(self):
+        self.client.cookies[settings.ANONYMOUS_SESSION_COOKIE_NAME] = 'a' * 32
+        with self.assertNumQueries(0):
+            self.client.get('/about/')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/about/')
+        self.assertNotEqual(context.captured_queries, [])
+
+    def test_compressed_page_revalidates_with_weak_etag(self):
+        response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_contact_form_gets_working_csrf_token(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.get('/contact/')
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        self.assertNotIn('PRERENDER', token)
+        response = client.post('/contact/', {
+            'csrfmiddlewaretoken': token, 'name': 'Анна', 'email': 'anna@example.com',
+            'phone': '+7 (999) 123-45-67', 'message': 'Здравствуйте',
+        }, follow=True)
+        self.assertContains(response, 'Ваше сообщение отправлено')
+
+    def test_model_change_rerenders_dependent_pages(self):
+        before = read_manifest()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.contact.phone = '+7 (913) 111-11-11'
+            self.contact.save()
+        after = read_manifest()
+        self.assertNotEqual(before['/about/']['file'], after['/about/']['file'])
+        self.assertContains(self.client.get('/about/'), '+7 (913) 111-11-11')
+
+    def test_stale_page_falls_back_to_view(self):
+        with override_settings(PRERENDER_MAX_AGE=0), self.assertNumQueries(1):
+            self.client.get('/about/')
+
+
+@plain_static
+class StartupTests(TransactionTestCase):
+    """warm_up() закрывает соединения, поэтому без обёртки в транзакцию"""
+
+    def test_migrate_if_needed_skips_applied_migrations(self):
+        self.assertEqual(pending_migrations(), [])
+        out = StringIO()
+        call_command('migrate_if_needed', stdout=out)
+        self.assertIn('Миграции применены', out.getvalue())
+
+    def test_warm_up_loads_prerendered_home_into_memory(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        with override_settings(PRERENDER_ENABLED=True, PRERENDER_ROOT=tmpdir):
+            warm_up()
+            self.assertIn('/', read_manifest())
+            self.assertIsNotNone(pages.get('/'))
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get('/').status_code, 200)
+
+
+class BookingLifecycleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.house = House.objects.create(
+            name='Кедр', description='Домик', capacity=4, price_per_night=5000, image='houses/kedr.jpg',
+        )
+
+    def book(self, status, check_in, check_out):
+        return Booking.objects.create(
+            house=self.house, guest_name='Гость', guest_phone='+79990000000',
+            check_in_date=check_in, check_out_date=check_out,
+            guests_count=2, total_price=10000, status=status,
+        )
+
+    def test_transitions_and_archive(self):
+        now = timezone.make_aware(timezone.datetime(2030, 7, 10, 12))
+        finished = [self.book('confirmed', '2030-07-01', '2030-07-05') for _ in range(5)]
+        upcoming = self.book('confirmed', '2030-07-20', '2030-07-25')
+        missed = self.book('pending', '2030-07-01', '2030-07-03')
+        old = self.book('cancelled', '2029-01-01', '2029-01-03')
+        old_created = old.created_at
+
+        result = run_lifecycle(chunk_size=2, archive_months=12, now=now)
+
+        self.assertEqual(result, {'completed': 5, 'expired': 1, 'archived': 1})
+        self.assertEqual(Booking.objects.get(pk=finished[0].pk).status, 'completed')
+        self.assertEqual(Booking.objects.get(pk=upcoming.pk).status, 'confirmed')
+        self.assertEqual(Booking.objects.get(pk=missed.pk).status, 'cancelled')
+        self.assertFalse(Booking.objects.filter(pk=old.pk).exists())
+        archived = BookingArchive.objects.get(pk=old.pk)
+        self.assertEqual((archived.status, archived.created_at), ('cancelled', old_created))
+
+    def test_rows_changed_after_selection_are_left_alone(self):
+        now = timezone.make_aware(timezone.datetime(2030, 7, 10, 12))
+        missed = self.book('pending', '2030-07-01', '2030-07-03')
+        old = self.book('cancelled', '2029-01-01', '2029-01-03')
+        chunked_ids = lifecycle.chunked_ids
+
+        def racing_chunked_ids(queryset, chunk_size):
+            # Администратор подтверждает бронирования между выбором ключей и записью
+            for ids in chunked_ids(queryset, chunk_size):
+                Booking.objects.filter(pk__in=ids).update(status='confirmed', check_out_date='2030-07-15')
+                yield ids
+
+        with mock.patch('main.lifecycle.chunked_ids', racing_chunked_ids):
+            result = run_lifecycle(chunk_size=2, archive_months=12, now=now)
+
+        self.assertEqual(result, {'completed': 0, 'expired': 0, 'archived': 0})
+        self.assertEqual(Booking.objects.get(pk=missed.pk).status, 'confirmed')
+        self.assertEqual(Booking.objects.get(pk=old.pk).status, 'confirmed')
+        self.assertFalse(BookingArchive.objects.exists())
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, seo, views
 
 app_name = 'main'
 
@@ -13,9 +13,14 @@ urlpatterns = [
     path('booking/success/<int:booking_id>/', views.booking_success, name='booking_success'),
     path('contact/', views.contact, name='contact'),
     path('about/', views.about, name='about'),
+    path('sitemap.xml', seo.sitemap, name='sitemap'),
     
     # API endpoints
     path('api/check-availability/', views.check_availability, name='check_availability'),
     path('api/calculate-price/', views.calculate_price, name='calculate_price'),
+    path('api/alternative-dates/', views.alternative_dates, name='alternative_dates'),
+    path('api/houses/', api.catalogue, {'resource_name': 'houses'}, name='api_houses'),
+    path('api/reviews/', api.catalogue, {'resource_name': 'reviews'}, name='api_reviews'),
+    path('api/gallery/', api.catalogue, {'resource_name': 'gallery'}, name='api_gallery'),
 ]
 
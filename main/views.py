@@ -1,15 +1,23 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.core.paginator import Paginator
 from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.db.utils import OperationalError, ProgrammingError
 import json
+import logging
 
+from .availability import afind_alternatives
+from .decorators import csrf_exempt, require_http_methods
+from .forms import BookingForm, ContactForm
+from .house_choices import aget_house_choice, choices_json
 from .models import House, Booking, Review, GalleryImage, Contact
-from django.db.utils import OperationalError, ProgrammingError
+from .ratelimit import rate_limit
+
+logger = logging.getLogger(__name__)
 
 
 def get_contact_safe():
@@ -25,7 +33,6 @@ def safe_list(queryset_fn, limit=None):
         return qs[:limit] if limit else qs
     except (OperationalError, ProgrammingError):
         return []
-from .forms import BookingForm, ContactForm
 
 
 def home(request):
@@ -39,40 +46,47 @@ def home(request):
     return render(request, 'main/home.html', context)
 
 
-def houses_list(request):
-    """Список всех домиков"""
-    houses = safe_list(lambda: House.objects.filter(is_available=True))
-    
+# Сортировки списка домиков: значение параметра sort -> поле order_by
+HOUSE_SORTS = {
+    'price_low': 'price_per_night',
+    'price_high': '-price_per_night',
+    'capacity': 'capacity',
+    'name': 'name',
+}
+
+
+def filter_houses(houses, params):
+    """Фильтры списка домиков (общие для страницы и JSON API)"""
     # Фильтрация по цене
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
     if min_price:
         houses = houses.filter(price_per_night__gte=min_price)
     if max_price:
         houses = houses.filter(price_per_night__lte=max_price)
     
     # Фильтрация по вместимости
-    capacity = request.GET.get('capacity')
+    capacity = params.get('capacity')
     if capacity:
         houses = houses.filter(capacity__gte=capacity)
     
     # Поиск по названию
-    search = request.GET.get('search')
+    search = params.get('search')
     if search:
         houses = houses.filter(
             Q(name__icontains=search) | Q(description__icontains=search)
         )
+    return houses
+
+
+def houses_list(request):
+    """Список всех домиков"""
+    houses = safe_list(lambda: House.objects.filter(is_available=True))
+    houses = filter_houses(houses, request.GET)
     
     # Сортировка
     sort_by = request.GET.get('sort', 'name')
-    if sort_by == 'price_low':
-        houses = houses.order_by('price_per_night')
-    elif sort_by == 'price_high':
-        houses = houses.order_by('-price_per_night')
-    elif sort_by == 'capacity':
-        houses = houses.order_by('capacity')
-    else:
-        houses = houses.order_by('name')
+    houses = houses.order_by(HOUSE_SORTS.get(sort_by, 'name'))
     
     # Пагинация
     paginator = Paginator(houses, 6) if houses else Paginator([], 6)
@@ -148,15 +162,21 @@ def booking(request):
     if request.method == 'POST':
         form = BookingForm(request.POST)
         if form.is_valid():
-            booking = form.save()
-            messages.success(request, 'Ваша заявка успешно отправлена! Мы свяжемся с вами в ближайшее время.')
-            return redirect('booking_success', booking_id=booking.id)
+            try:
+                booking = form.save()
+            except ValidationError as e:
+                # Домик изменился после того, как попал в кэш формы
+                form.add_error(None, e)
+            else:
+                messages.success(request, 'Ваша заявка успешно отправлена! Мы свяжемся с вами в ближайшее время.')
+                return redirect('main:booking_success', booking_id=booking.id)
     else:
         form = BookingForm()
     
     context = {
         'form': form,
-        'houses': House.objects.filter(is_available=True),
+        # Цены и вместимость для расчёта в браузере — тот же кэшированный список, что у формы
+        'house_choices': choices_json(form.house_choices),
         'contact': get_contact_safe(),
     }
     return render(request, 'main/booking.html', context)
@@ -179,7 +199,7 @@ def contact(request):
         if form.is_valid():
             # Здесь можно добавить отправку email или сохранение в базу
             messages.success(request, 'Ваше сообщение отправлено! Мы ответим вам в ближайшее время.')
-            return redirect('contact')
+            return redirect('main:contact')
     else:
         form = ContactForm()
     
@@ -198,10 +218,12 @@ def about(request):
     return render(request, 'main/about.html', context)
 
 
-# API views для AJAX запросов
+# API views для AJAX запросов.
+# Асинхронные: под ASGI медленный клиент не занимает воркер целиком.
 @csrf_exempt
 @require_http_methods(["POST"])
-def check_availability(request):
+@rate_limit('check_availability')
+async def check_availability(request):
     """Проверка доступности дат для бронирования"""
     try:
         data = json.loads(request.body)
@@ -215,27 +237,29 @@ def check_availability(request):
         # Проверяем, есть ли пересечения с существующими бронированиями
         conflicting_bookings = Booking.objects.filter(
             house_id=house_id,
-            status__in=['pending', 'confirmed'],
+            status__in=Booking.ACTIVE_STATUSES,
             check_in_date__lt=check_out,
             check_out_date__gt=check_in
         )
         
-        is_available = not conflicting_bookings.exists()
+        is_available = not await conflicting_bookings.aexists()
         
         return JsonResponse({
             'available': is_available,
             'message': 'Даты доступны' if is_available else 'Даты заняты'
         })
         
-    except json.JSONDecodeError:
+    except (ValueError, TypeError, ValidationError):
         return JsonResponse({'error': 'Неверный формат данных'}, status=400)
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    except Exception:
+        logger.exception('Ошибка API %s', request.path)
+        return JsonResponse({'error': 'Внутренняя ошибка сервера'}, status=500)
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def calculate_price(request):
+@rate_limit('calculate_price')
+async def calculate_price(request):
     """Расчет стоимости бронирования"""
     try:
         data = json.loads(request.body)
@@ -246,7 +270,9 @@ def calculate_price(request):
         if not all([house_id, check_in, check_out]):
             return JsonResponse({'error': 'Не все данные предоставлены'}, status=400)
         
-        house = get_object_or_404(House, id=house_id)
+        house = await aget_house_choice(house_id)
+        if house is None:
+            return JsonResponse({'error': 'Домик не найден'}, status=404)
         
         # Парсим даты
         from datetime import datetime
@@ -255,15 +281,68 @@ def calculate_price(request):
         
         # Рассчитываем количество ночей
         nights = (check_out_date - check_in_date).days
-        total_price = house.price_per_night * nights
+        total_price = house['price_per_night'] * nights
         
         return JsonResponse({
             'nights': nights,
-            'price_per_night': float(house.price_per_night),
+            'price_per_night': float(house['price_per_night']),
             'total_price': float(total_price)
         })
         
-    except json.JSONDecodeError:
+    except (ValueError, TypeError, ValidationError):
+        return JsonResponse({'error': 'Неверный формат данных'}, status=400)
+    except Exception:
+        logger.exception('Ошибка API %s', request.path)
+        return JsonResponse({'error': 'Внутренняя ошибка сервера'}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@rate_limit('alternative_dates')
+async def alternative_dates(request):
+    """Ближайшие свободные даты до и после желаемых (для домика или по вместимости)"""
+    try:
+        data = json.loads(request.body)
+        house_id = data.get('house_id')
+        guests = data.get('guests')
+        check_in = data.get('check_in')
+        check_out = data.get('check_out')
+        
+        if not all([check_in, check_out]) or not (house_id or guests):
+            return JsonResponse({'error': 'Не все данные предоставлены'}, status=400)
+        
+        from datetime import datetime, timedelta
+        check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
+        check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
+        nights = (check_out_date - check_in_date).days
+        if nights < 1:
+            return JsonResponse({'error': 'Минимальный период бронирования - 1 ночь'}, status=400)
+        
+        houses = House.objects.filter(is_available=True)
+        if house_id:
+            houses = houses.filter(id=house_id)
+        else:
+            houses = houses.filter(capacity__gte=int(guests))
+        houses = [house async for house in houses.only('id', 'name')]
+        
+        # Ищем не дальше горизонта в обе стороны от желаемых дат и не в прошлом
+        horizon = timedelta(days=settings.ALTERNATIVE_DATES_HORIZON_DAYS)
+        desired_start = max(check_in_date, timezone.localdate())
+        suggestions = await afind_alternatives(
+            houses,
+            desired_start=desired_start,
+            nights=nights,
+            earliest=max(desired_start - horizon, timezone.localdate()),
+            horizon_end=desired_start + horizon,
+        )
+        
+        return JsonResponse({
+            'nights': nights,
+            'suggestions': suggestions[:settings.ALTERNATIVE_DATES_MAX_RESULTS],
+        })
+        
+    except (ValueError, TypeError, ValidationError):
         return JsonResponse({'error': 'Неверный формат данных'}, status=400)
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    except Exception:
+        logger.exception('Ошибка API %s', request.path)
+        return JsonResponse({'error': 'Внутренняя ошибка сервера'}, status=500)
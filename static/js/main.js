@@ -11,6 +11,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initLazyLoading();
     initMobileMenu();
     initMap();
+    initAvailabilityCheck();
 });
 
 // Header functionality
@@ -286,6 +287,106 @@ function initMap() {
     }
 }
 
+// Availability check with alternative dates on the booking form
+function initAvailabilityCheck() {
+    const form = document.getElementById('bookingForm');
+    const houseSelect = document.getElementById('id_house');
+    const checkInInput = document.getElementById('id_check_in_date');
+    const checkOutInput = document.getElementById('id_check_out_date');
+    const guestsSelect = document.getElementById('id_guests_count');
+    if (!form || !houseSelect || !checkInInput || !checkOutInput) {
+        return;
+    }
+
+    const box = document.createElement('div');
+    box.className = 'availability-suggestions mt-2';
+    (checkOutInput.closest('.row') || checkOutInput).after(box);
+
+    function postJson(url, payload) {
+        return fetch(url, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(payload),
+        }).then(response => response.json());
+    }
+
+    function applyWindow(houseId, window) {
+        houseSelect.value = houseId;
+        checkInInput.value = window.check_in;
+        checkOutInput.value = window.check_out;
+        // Пересчёт стоимости и повторная проверка
+        [houseSelect, checkInInput, checkOutInput].forEach(field => {
+            field.dispatchEvent(new Event('change'));
+        });
+    }
+
+    function renderSuggestions(suggestions) {
+        box.innerHTML = '';
+        if (!suggestions.length) {
+            box.innerHTML = '<div class="alert alert-warning">Даты заняты, свободных окон поблизости не найдено</div>';
+            return;
+        }
+        const alert = document.createElement('div');
+        alert.className = 'alert alert-warning';
+        alert.innerHTML = '<strong>Даты заняты.</strong> Ближайшие свободные варианты:';
+        suggestions.forEach(item => {
+            [item.before, item.after].forEach(window => {
+                // Если окно до и после совпадает, показываем его один раз
+                if (!window || (window === item.after && item.before && item.before.check_in === window.check_in)) {
+                    return;
+                }
+                const button = document.createElement('button');
+                button.type = 'button';
+                button.className = 'btn btn-sm btn-outline-primary ms-2 mt-2';
+                button.textContent = `${item.house_name}: ${window.check_in} — ${window.check_out}`;
+                button.addEventListener('click', () => applyWindow(item.house_id, window));
+                alert.appendChild(button);
+            });
+        });
+        box.appendChild(alert);
+    }
+
+    const check = debounce(function() {
+        const payload = {
+            house_id: houseSelect.value,
+            check_in: checkInInput.value,
+            check_out: checkOutInput.value,
+        };
+        if (!payload.house_id || !payload.check_in || !payload.check_out || payload.check_out <= payload.check_in) {
+            box.innerHTML = '';
+            return;
+        }
+        postJson('/api/check-availability/', payload)
+            .then(data => {
+                if (data.available !== false) {
+                    box.innerHTML = '';
+                    return;
+                }
+                // Свободные окна выбранного домика и других домиков нужной вместимости
+                const guests = guestsSelect && guestsSelect.value;
+                return Promise.all([
+                    postJson('/api/alternative-dates/', payload),
+                    guests ? postJson('/api/alternative-dates/', {...payload, house_id: null, guests: guests}) : null,
+                ]).then(([own, others]) => {
+                    const suggestions = (own.suggestions || []).slice();
+                    ((others && others.suggestions) || []).forEach(item => {
+                        if (item.house_id !== Number(payload.house_id)) {
+                            suggestions.push(item);
+                        }
+                    });
+                    renderSuggestions(suggestions);
+                });
+            })
+            .catch(() => {
+                box.innerHTML = '';
+            });
+    }, 300);
+
+    [houseSelect, checkInInput, checkOutInput].forEach(field => {
+        field.addEventListener('change', check);
+    });
+}
+
 // Utility functions
 function debounce(func, wait) {
     let timeout;